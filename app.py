@@ -1,26 +1,44 @@
 import streamlit as st
-from lib.sb import sb_client
+from lib import trace
 from lib.auth import handle_oauth_exchange, sign_in_with_google_button
+from lib.sb import sb_client
 from lib.ui.browse import render_browse_tab
+from lib.ui.detail import render_listing_detail
 from lib.ui.post import render_post_tab
 from lib.ui.saved import render_saved_tab
+from lib.ui.inbox import render_inbox_tab
 from lib.ui.theme import load_css
 from lib.ui.components import hero, search_bar, listing_card
+from lib.ui.debug import render_debug_panel
+from lib.enrich import start_inline_worker, worker_mode
+from lib.suggest import warm_suggestions
 
-load_css()        # injects lib/ui/styles.css
-hero()            # shows the banner/header
-q = search_bar()  # pretty search bar under the banner
+trace.begin_rerun()
 
+# must be the first Streamlit command
 st.set_page_config(page_title="Rent-a-Cos", page_icon="🗡️", layout="wide")
+
+if worker_mode() == "inline":
+    start_inline_worker()   # once per process: enriches listings after Publish
+warm_suggestions()          # once per process: loads the search-suggestion index in the background
+
+load_css()        # injects lib/ui/styles.css (minified, cached per process)
+hero()            # shows the banner/header
+q = search_bar()  # pretty search bar under the banner; feeds the Browse filter
+
 if "user" not in st.session_state: st.session_state.user = None
 
 handle_oauth_exchange()  # grabs ?code=..., exchanges, sets session_state.user
 
 st.title("🗡️ Rent-a-Cos")
-tabs = st.tabs(["Browse","Post listing","Saved searches"])
+tabs = st.tabs(["Browse","Post listing","Saved searches","💬 Messages"])
 
 with tabs[0]:
-    render_browse_tab()
+    # Cards open a listing by setting ?listing= from a button callback, which keeps the session.
+    if st.query_params.get("listing"):
+        render_listing_detail(sb_client(), st.query_params["listing"])
+    else:
+        render_browse_tab(query=q)
 
 with tabs[1]:
     if not st.session_state.user:
@@ -35,6 +53,13 @@ with tabs[2]:
     else:
         render_saved_tab()
 
+with tabs[3]:
+    if not st.session_state.user:
+        st.info("Sign in to message sellers.")
+        sign_in_with_google_button(key="signin_google_tab3")
+    else:
+        render_inbox_tab()
+
 cols = st.columns(2)
 with cols[0]:
     listing_card(
@@ -56,3 +81,5 @@ with cols[1]:
 
 st.markdown("---")
 st.write("⚠️ Rent-a-Cos does not provide delivery or payments. Users arrange their own transactions securely.")
+
+render_debug_panel(trace.end_rerun())
@@ -1,83 +1,144 @@
 # lib/ai.py
-import streamlit as st, requests
+import hashlib, os
+import streamlit as st
 
 from lib.constants import FRANCHISE_CANDIDATES, POPULAR_CHARACTERS
+from lib.hf import infer, hf_token
+from lib.cache import disk_cached, get_cache, make_key
+from lib.local_ai import get_classifier
+
+LLM_MODEL = "meta-llama/Meta-Llama-3.1-8B-Instruct"
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+CAPTION_MODEL = "Salesforce/blip-image-captioning-base"
+NER_MODEL = "dslim/bert-base-NER"
+
+TAG_LABELS = ["anime","manga","cosplay","prop","weapon","costume","figure","collectible","handmade","official",
+              "wig","accessory","Naruto","One Piece","Attack on Titan","My Hero Academia","Demon Slayer","Dragon Ball","Bleach"]
+# Both heads are scored in one multi-label request over the union of their labels.
+CLASSIFY_LABELS = TAG_LABELS + [f for f in FRANCHISE_CANDIDATES if f not in TAG_LABELS]
+TAG_THRESHOLD = 0.5   # multi-label entailment probability
+
+def ai_backend() -> str:
+    """"local" (never call HF), "hybrid" (local first, HF on request) or "remote" (always HF)."""
+    try:
+        backend = st.secrets.get("AI_BACKEND", "")
+    except Exception:
+        backend = ""
+    backend = (backend or os.environ.get("AI_BACKEND", "hybrid")).lower()
+    return backend if backend in ("local", "hybrid", "remote") else "hybrid"
+
+def _use_remote(refine: bool) -> bool:
+    backend = ai_backend()
+    return bool(hf_token()) and (backend == "remote" or (backend == "hybrid" and refine))
+
+def _merge(primary, secondary):
+    out = list(primary)
+    out += [x for x in secondary if x not in out]
+    return out
+
+# Remote calls are disk-cached on (model, parameters, input); failures raise and are not cached.
+
+@disk_cached(f"generate:{LLM_MODEL}")
+def _generate(prompt, max_new_tokens):
+    js = infer(LLM_MODEL, json={"inputs": prompt, "parameters":{"max_new_tokens":max_new_tokens}})
+    if isinstance(js, list) and js and "generated_text" in js[0]:
+        return js[0]["generated_text"].strip()
+    raise ValueError("no generated_text in response")
+
+def _zero_shot_batch(texts, labels=CLASSIFY_LABELS):
+    """{label: score} per text from one multi-label request; cached per text so batches reuse hits."""
+    cache = get_cache()
+    keys = [make_key(f"zero-shot-multi:{ZERO_SHOT_MODEL}", t, labels) for t in texts]
+    results = [cache.get(k) for k in keys]
+    todo = [i for i, r in enumerate(results) if r is None]
+    if todo:
+        out = infer(ZERO_SHOT_MODEL, json={"inputs": [texts[i] for i in todo],
+                                           "parameters": {"candidate_labels": labels, "multi_label": True}})
+        if isinstance(out, dict):
+            out = [out]
+        if len(out) != len(todo):
+            raise ValueError("zero-shot response does not match the batch")
+        for i, res in zip(todo, out):
+            results[i] = dict(zip(res.get("labels",[]), res.get("scores",[])))
+            cache.set(keys[i], results[i])
+    return results
+
+@disk_cached(f"caption:{CAPTION_MODEL}", key=lambda digest, image_bytes: digest)
+def _caption(digest, image_bytes):
+    js = infer(CAPTION_MODEL, data=image_bytes, headers={"Accept":"application/json"})
+    if isinstance(js, list) and js and "generated_text" in js[0]:
+        return js[0]["generated_text"]
+    raise ValueError("no generated_text in response")
+
+@disk_cached(f"ner:{NER_MODEL}")
+def _ner(text):
+    return [ent for ent in infer(NER_MODEL, json={"inputs": text}) if isinstance(ent, dict)]
 
-@st.cache_data(show_spinner=False)
 def write_with_ai(title, franchise, character, ltype, handmade):
-    HF_TOKEN = st.secrets.get("HF_TOKEN","")
-    if not HF_TOKEN: return "Add HF_TOKEN in Streamlit secrets to enable AI."
-    url = "https://api-inference.huggingface.co/models/meta-llama/Meta-Llama-3.1-8B-Instruct"
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
+    if not hf_token(): return "Add HF_TOKEN in Streamlit secrets to enable AI."
     prompt = (f"Write an 80-120 word marketplace listing for a cosplay item.\n"
               f"Title: {title}\nFranchise: {franchise}\nCharacter: {character}\n"
               f"Type: {ltype}. Handmade: {handmade}. Include fit, sizing, materials, condition, who it suits.")
     try:
-        r = requests.post(url, headers=headers, json={"inputs": prompt, "parameters":{"max_new_tokens":200}}, timeout=60)
-        js = r.json()
-        if isinstance(js, list) and js and "generated_text" in js[0]:
-            return js[0]["generated_text"].strip()
+        return _generate(prompt, 200)
     except Exception:
-        pass
-    return "AI is busy. Try again."
-
-@st.cache_data(show_spinner=False)
-def auto_tags(text):
-    HF_TOKEN = st.secrets.get("HF_TOKEN","")
-    if not HF_TOKEN: return []
-    url = "https://api-inference.huggingface.co/models/facebook/bart-large-mnli"
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-    labels = ["anime","manga","cosplay","prop","weapon","costume","figure","collectible","handmade","official",
-              "wig","accessory","Naruto","One Piece","Attack on Titan","My Hero Academia","Demon Slayer","Dragon Ball","Bleach"]
-    try:
-        r = requests.post(url, headers=headers, json={"inputs": text, "parameters":{"candidate_labels": labels}}, timeout=60)
-        out = r.json()
-        return [lbl for lbl,score in zip(out.get("labels",[]), out.get("scores",[])) if score>0.35][:12]
-    except Exception:
-        return []
-
-@st.cache_data(show_spinner=False)
-def hf_caption(image_bytes: bytes) -> str:
-    HF_TOKEN = st.secrets.get("HF_TOKEN","")
-    if not HF_TOKEN: return ""
-    url = "https://api-inference.huggingface.co/models/Salesforce/blip-image-captioning-base"
-    headers = {"Authorization": f"Bearer {HF_TOKEN}", "Accept":"application/json"}
-    try:
-        r = requests.post(url, headers=headers, data=image_bytes, timeout=60)
-        js = r.json()
-        if isinstance(js, list) and js and "generated_text" in js[0]:
-            return js[0]["generated_text"]
-    except Exception:
-        pass
-    return ""
-
-@st.cache_data(show_spinner=False)
-def guess_franchise_from_text(text: str):
-    HF_TOKEN = st.secrets.get("HF_TOKEN","")
-    if not HF_TOKEN: return []
-    url = "https://api-inference.huggingface.co/models/facebook/bart-large-mnli"
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-    payload = {"inputs": text, "parameters": {"candidate_labels": FRANCHISE_CANDIDATES}}
+        return "AI is busy. Try again."
+
+def classify_batch(texts, refine=False, classifier=None, strict=False):
+    """[{"tags": [...], "franchises": [...]}] per text: local lexicon, refined by one zero-shot call.
+
+    A failed zero-shot call falls back to the lexicon, or raises with `strict` (background jobs retry).
+    """
+    clf = classifier or get_classifier()
+    local = [(clf.tags(t), clf.franchises(t)) for t in texts]
+    remote = None
+    if texts and _use_remote(refine):
+        try:
+            remote = _zero_shot_batch(list(texts))
+        except Exception:
+            if strict:
+                raise
+            remote = None
+    out = []
+    for i, (tags, franchises) in enumerate(local):
+        if remote is not None:
+            scores = remote[i]
+            r_tags = [l for l in TAG_LABELS if scores.get(l, 0) > TAG_THRESHOLD]
+            r_tags.sort(key=lambda l: -scores[l])
+            r_fr = sorted(FRANCHISE_CANDIDATES, key=lambda l: -scores.get(l, 0))[:5]
+            tags = _merge(r_tags, tags)
+            # Lexical hits are near-certain; remote ranking fills in behind them.
+            franchises = _merge(franchises[:1], _merge(r_fr, franchises))
+        out.append({"tags": tags[:12], "franchises": franchises[:5]})
+    return out
+
+def classify(text, refine=False):
+    return classify_batch([text], refine)[0]
+
+def auto_tags(text, refine=False):
+    return classify(text, refine)["tags"]
+
+def hf_caption(image_bytes: bytes, digest: str = None, strict=False) -> str:
+    """Caption an image; pass its sha256 `digest` if already known to skip rehashing.
+
+    Returns "" on a failed request unless `strict`, which re-raises it.
+    """
+    if not hf_token(): return ""
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=60)
-        out = r.json()
-        pairs = list(zip(out.get("labels",[]), out.get("scores",[])))
-        return [lbl for lbl,score in sorted(pairs, key=lambda x: -x[1])][:5]
+        return _caption(digest or hashlib.sha256(image_bytes).hexdigest(), image_bytes)
     except Exception:
-        return []
+        if strict:
+            raise
+        return ""
+
+def guess_franchise_from_text(text: str, refine=False):
+    return classify(text, refine)["franchises"]
 
-@st.cache_data(show_spinner=False)
 def hf_ner_people(text: str):
-    HF_TOKEN = st.secrets.get("HF_TOKEN","")
-    if not HF_TOKEN or not text: return []
-    url = "https://api-inference.huggingface.co/models/dslim/bert-base-NER"
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
+    if not hf_token() or not text: return []
     try:
-        r = requests.post(url, headers=headers, json={"inputs": text}, timeout=60)
-        names=[]
-        for ent in r.json():
-            if isinstance(ent, dict) and ent.get("entity_group") == "PER" and ent.get("score",0)>0.80:
-                names.append(ent.get("word"))
+        names = [ent.get("word") for ent in _ner(text)
+                 if ent.get("entity_group") == "PER" and ent.get("score",0)>0.80]
     except Exception:
         names=[]
     seen=set(); out=[]
@@ -86,9 +147,10 @@ def hf_ner_people(text: str):
             seen.add(n); out.append(n)
     return out
 
-@st.cache_data(show_spinner=False)
-def suggest_characters(franchise: str, context_text: str):
-    base = POPULAR_CHARACTERS.get(franchise, [])
+@st.cache_data(show_spinner=False, max_entries=256)
+def suggest_characters(franchise: str, context_text: str, refine=False):
+    base = get_classifier().characters(franchise, context_text) or POPULAR_CHARACTERS.get(franchise, [])
+    if not _use_remote(refine): return base[:10]
     ner = hf_ner_people(context_text)
     ranked=[]
     for name in base:
@@ -0,0 +1,63 @@
+# lib/alerts.py
+# Saved-search alerts: one fetch of new listings, every saved search matched in memory.
+# A listing matches when every query word appears in its title/franchise/character/tags
+# (substrings count). Browse uses the ranked search RPC instead, which matches whole words
+# and close spellings, so the two can differ by a few listings; see MATCH_NOTE.
+import datetime as dt
+import streamlit as st
+from dateutil.parser import isoparse
+
+from lib.data import latest_marker, recent_listings
+
+ALERT_SCAN_LIMIT = 1000   # newest listings considered per evaluation
+MATCH_NOTE = ("Counts include listings containing every word of the search; Browse also matches close "
+              "spellings, so its results can differ slightly.")
+
+def _parse_ts(value):
+    ts = isoparse(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=dt.timezone.utc)
+
+def match_saved_searches(saved, listings):
+    """Count listings matching each saved search, applying since/city/types/query filters."""
+    prepared = []
+    for r in listings:
+        try:
+            created = _parse_ts(r.created_at)
+        except Exception:
+            continue
+        prepared.append((created, r.city, r.ltype, r.key))
+    counts = {}
+    for s in saved:
+        since = _parse_ts(s.last_seen) if s.last_seen else None
+        ltypes = set(s.ltypes)
+        n = 0
+        for created, r_city, r_ltype, hay in prepared:
+            if since and created < since: continue
+            if s.city and r_city != s.city: continue
+            if ltypes and r_ltype not in ltypes: continue
+            if s.terms and not all(t in hay for t in s.terms): continue
+            n += 1
+        counts[s.id] = n
+    return counts
+
+def alert_counts(sb, saved):
+    """({saved_search_id: new match count}, {ids whose count is a lower bound}).
+
+    Only the newest ALERT_SCAN_LIMIT listings are scanned; a search whose last check is older
+    than the oldest of them may have more matches. Re-evaluated only when a newer listing exists.
+    """
+    if not saved:
+        return {}, set()
+    sig = (latest_marker(sb), tuple(saved))
+    cached = st.session_state.get("alert_counts")
+    if cached and cached["sig"] == sig:
+        return cached["counts"], cached["partial"]
+    oldest = min((s.last_seen for s in saved if s.last_seen), default=None)
+    rows = recent_listings(sb, oldest, ALERT_SCAN_LIMIT)
+    counts = match_saved_searches(saved, rows)
+    partial = set()
+    if len(rows) == ALERT_SCAN_LIMIT:
+        cutoff = _parse_ts(rows[-1].created_at)
+        partial = {s.id for s in saved if not s.last_seen or _parse_ts(s.last_seen) < cutoff}
+    st.session_state["alert_counts"] = {"sig": sig, "counts": counts, "partial": partial}
+    return counts, partial
@@ -1,10 +1,10 @@
 import streamlit as st
-from lib.sb import sb_client
+from lib.sb import session_client
 
 def handle_oauth_exchange():
     code = st.query_params.get("code")
     if code and not st.session_state.get("user"):
-        sb = sb_client()
+        sb = session_client()
         try:
             session = sb.auth.exchange_code_for_session({"auth_code": code})
             # store user in session
@@ -19,7 +19,7 @@ def handle_oauth_exchange():
 def sign_in_with_google_button(key: str = "signin_google"):
     """Render a Google sign-in button. Pass a unique `key` if used in multiple places."""
     if st.button("Sign in with Google", key=key):
-        sb = sb_client()
+        sb = session_client()
         redirect = st.secrets["supabase"].get("redirect_url", "")
         try:
             res = sb.auth.sign_in_with_oauth(
@@ -0,0 +1,184 @@
+# lib/bulk.py
+# Bulk listing import: a CSV (one row per listing) plus an optional ZIP of photos.
+# Validation is column-wise over the whole frame; photos go through lib.images for a
+# chunk of rows at a time, then the chunk is inserted in one request. Every row carries
+# an import_ref, so running the same import again only inserts what is missing.
+import io, os, uuid, zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from lib.data import ALL_TYPES, imported_refs, insert_listings, update_listing
+from lib.enrich import enqueue_enrichment, enrichment_payload, image_fields
+from lib.images import MAX_IMAGES, upload_images_to_storage
+from lib.trace import bind
+
+REQUIRED = ("title", "ltype", "price", "city", "description")
+OPTIONAL = ("ref", "price_unit", "franchise", "character", "tags", "images", "quantity")
+CHUNK = 50             # rows per insert request
+IMAGE_WORKERS = 4      # rows whose photos are processed at once (each fans out in lib.images)
+TEMPLATE = ",".join(REQUIRED + OPTIONAL) + "\n" + \
+    'Gojo blindfold + wig,rent,299,Pune,Silk blindfold and styled wig,gojo-01,day,Jujutsu Kaisen,Satoru Gojo,wig;accessory,gojo1.jpg;gojo2.jpg,1\n'
+
+class ImageArchive:
+    """Photos from a ZIP, looked up by file name (case-insensitive, folders ignored)."""
+
+    def __init__(self, f):
+        self.zip = zipfile.ZipFile(f)
+        self.names = {}
+        for n in self.zip.namelist():
+            base = os.path.basename(n)
+            if base and not base.startswith("."):
+                self.names.setdefault(base.casefold(), n)
+
+    def open(self, name) -> io.BytesIO:
+        return io.BytesIO(self.zip.read(self.names[name.casefold()]))
+
+@dataclass(slots=True)
+class ImportReport:
+    total: int = 0
+    inserted: int = 0
+    skipped: int = 0       # already imported by an earlier run
+    queued: int = 0        # sent to the enrichment worker for tags/franchise
+    errors: list = field(default_factory=list)   # (csv row, message)
+
+    def error_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(sorted(self.errors, key=lambda e: e[0]), columns=["row", "error"])
+
+def read_csv(f) -> pd.DataFrame:
+    """All cells as stripped strings; the index is the spreadsheet row number (header = 1)."""
+    df = pd.read_csv(f, dtype=str, keep_default_na=False, skipinitialspace=True)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df.index = pd.RangeIndex(2, len(df) + 2)
+    return df
+
+def _split(col: pd.Series) -> pd.Series:
+    return col.str.split(r"\s*[;,]\s*").map(lambda xs: [x for x in xs if x])
+
+def validate(df: pd.DataFrame, image_names=None):
+    """(rows ready to import, errors DataFrame[row, error]). Raises ValueError for a bad header.
+
+    `image_names` (casefolded file names from the ZIP) enables the missing-photo check.
+    """
+    missing = [c for c in REQUIRED if c not in df.columns]
+    if missing:
+        raise ValueError("CSV is missing required columns: " + ", ".join(missing))
+    df = df.reindex(columns=list(REQUIRED + OPTIONAL), fill_value="").astype(str).apply(lambda c: c.str.strip())
+
+    out = df[["title", "city", "description", "franchise", "character"]].copy()
+    out["ltype"] = df["ltype"].str.lower()
+    price = pd.to_numeric(df["price"].str.replace(r"[₹,\s]", "", regex=True), errors="coerce")
+    quantity = pd.to_numeric(df["quantity"].replace("", "1"), errors="coerce")
+    out["price_unit"] = df["price_unit"].str.lower().where(df["price_unit"] != "",
+                                                           np.where(out["ltype"] == "rent", "day", "fixed"))
+    out["tags"] = _split(df["tags"])
+    out["images"] = _split(df["images"])
+    # Rows without a ref get one from their content, so re-running the same file is a no-op.
+    content = pd.util.hash_pandas_object(df[list(REQUIRED) + ["images"]], index=False)
+    out["import_ref"] = df["ref"].where(df["ref"] != "", "row-" + content.map("{:016x}".format))
+
+    checks = [
+        (out["title"] == "", "title is required"),
+        (~out["ltype"].isin(ALL_TYPES), "ltype must be one of " + ", ".join(ALL_TYPES)),
+        (price.isna() | (price < 0), "price must be a number ≥ 0"),
+        (~out["price_unit"].isin(("day", "fixed")), "price_unit must be day or fixed"),
+        (out["city"] == "", "city is required"),
+        (out["description"] == "", "description is required"),
+        (quantity.isna() | (quantity < 1) | (quantity % 1 != 0), "quantity must be a whole number ≥ 1"),
+        (out["images"].str.len() > MAX_IMAGES, f"at most {MAX_IMAGES} images per listing"),
+        (out["import_ref"].duplicated(), "duplicate ref (or an identical earlier row)"),
+    ]
+    errors = [pd.DataFrame({"row": out.index[mask], "error": msg}) for mask, msg in checks if mask.any()]
+    bad = np.logical_or.reduce([m.to_numpy() for m, _ in checks])
+
+    if image_names is not None:
+        names = out["images"].explode().dropna()
+        absent = names[~names.str.casefold().isin(image_names)]
+        if len(absent):
+            msgs = "image not in ZIP: " + absent.groupby(level=0).agg(", ".join)
+            errors.append(pd.DataFrame({"row": msgs.index, "error": msgs.to_numpy()}))
+            bad |= out.index.isin(msgs.index)
+
+    out["price"] = price.fillna(0).round().astype(int)
+    out["quantity"] = quantity.fillna(1).astype(int)
+    errors = (pd.concat(errors).sort_values("row", kind="stable").reset_index(drop=True) if errors
+              else pd.DataFrame(columns=["row", "error"]))
+    return out[~bad], errors
+
+def _record(r, owner, renditions, status) -> dict:
+    return {"id": str(uuid.uuid4()), "owner": owner, "import_ref": r.import_ref, "ltype": r.ltype, "title": r.title,
+            "price": int(r.price), "price_unit": r.price_unit, "city": r.city, "description": r.description,
+            "franchise": r.franchise or None, "character": r.character or None, "tags": r.tags,
+            "quantity": int(r.quantity), "status": status, **image_fields(renditions)}
+
+def import_listings(sb, owner, df, images: ImageArchive = None, enrich=False, chunk=CHUNK,
+                    workers=IMAGE_WORKERS, on_progress=None) -> ImportReport:
+    """Validate and insert every row of `df` (from read_csv) for `owner`.
+
+    With `enrich`, rows missing tags or a franchise are inserted as "enriching" and queued for
+    the enrichment worker; everything else goes live straight away. `on_progress(done, total)`
+    is called after each chunk.
+    """
+    rows, errors = validate(df, set(images.names) if images else None)
+    report = ImportReport(total=len(df), errors=list(errors.itertuples(index=False, name=None)))
+    done = rows["import_ref"].isin(imported_refs(sb, owner, rows["import_ref"]))
+    report.skipped = int(done.sum())
+    rows = rows[~done]
+
+    def photos(r):
+        if not r.images:
+            return []
+        if images is None:
+            raise ValueError("row lists images but no ZIP was given")
+        return upload_images_to_storage([images.open(n) for n in r.images], owner, sb=sb)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(rows), chunk):
+            part = list(rows.iloc[start:start + chunk].itertuples())
+            futures = [pool.submit(bind(photos), r) for r in part]
+            ready = []
+            for r, fut in zip(part, futures):
+                try:
+                    renditions = fut.result()
+                except Exception as e:
+                    report.errors.append((r.Index, f"images: {e}"))
+                    continue
+                needs = enrich and not (r.tags and r.franchise)
+                ready.append((r, renditions, _record(r, owner, renditions, "enriching" if needs else "active")))
+            inserted = _insert(sb, ready, report)
+            for r, renditions, rec in ready:
+                if rec["status"] == "enriching" and rec["id"] in inserted:
+                    _enqueue(sb, r.Index, rec, renditions, report)
+            if on_progress:
+                on_progress(min(start + chunk, len(rows)), len(rows))
+    return report
+
+def _insert(sb, ready, report) -> set:
+    """One request for the chunk; if it fails, row by row so the error lands on the right row."""
+    try:
+        ids = set(insert_listings(sb, [rec for _, _, rec in ready]))
+    except Exception:
+        ids = set()
+        for r, _, rec in ready:
+            try:
+                ids.update(insert_listings(sb, [rec]))
+            except Exception as e:
+                report.errors.append((r.Index, str(e)))
+    report.inserted += len(ids)
+    return ids
+
+def _enqueue(sb, row, rec, renditions, report):
+    """Queue enrichment for an inserted row; if that fails, publish it as is."""
+    fields = {k: rec[k] for k in ("title", "description", "franchise", "character", "tags")}
+    try:
+        payload = enrichment_payload(rec["id"], rec["owner"], [], fields)
+        payload["renditions"] = renditions      # already uploaded: the worker only classifies
+        enqueue_enrichment(payload)
+        report.queued += 1
+    except Exception as e:
+        try:
+            update_listing(sb, rec["id"], {"status": "active"})
+        except Exception as e2:
+            report.errors.append((row, f"inserted but hidden: enrichment failed ({e}) and publishing failed ({e2})"))
@@ -0,0 +1,114 @@
+# lib/cache.py
+# Disk-backed, bounded cache for AI results. SQLite in WAL mode so several Streamlit
+# worker processes (and the CLI jobs) can share one file safely.
+import functools, hashlib, json, os, sqlite3, threading, time
+
+DEFAULT_PATH = os.environ.get("AI_CACHE_PATH", ".cache/ai_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", "20000"))
+DEFAULT_TTL = int(os.environ.get("AI_CACHE_TTL", str(30 * 24 * 3600)))
+EVICT_EVERY = 100   # check the size bound once per this many writes
+
+def _canonical(value):
+    """JSON-able form of call arguments; bytes become a content hash so they're never stored."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"sha256": hashlib.sha256(bytes(value)).hexdigest()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items())}
+    return value
+
+def make_key(namespace: str, *args, **kwargs) -> str:
+    blob = json.dumps([namespace, _canonical(args), _canonical(kwargs)], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class DiskCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path, self.max_entries, self.ttl = path, max_entries, ttl
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as db:
+            db.execute("create table if not exists entries (key text primary key, value text not null,"
+                       " created real not null, accessed real not null)")
+            db.execute("create index if not exists entries_accessed_idx on entries(accessed)")
+            db.execute("create table if not exists stats (name text primary key, value integer not null)")
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("pragma journal_mode=wal")
+            db.execute("pragma synchronous=normal")
+            self._local.db = db
+        return db
+
+    def _bump(self, db, name):
+        db.execute("insert into stats(name, value) values (?, 1)"
+                   " on conflict(name) do update set value = value + 1", (name,))
+
+    def get(self, key, default=None):
+        db, now = self._conn(), time.time()
+        row = db.execute("select value, created from entries where key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                db.execute("delete from entries where key = ?", (key,))
+            self._bump(db, "misses")
+            return default
+        db.execute("update entries set accessed = ? where key = ?", (now, key))
+        self._bump(db, "hits")
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        db, now = self._conn(), time.time()
+        db.execute("insert or replace into entries(key, value, created, accessed) values (?, ?, ?, ?)",
+                   (key, json.dumps(value), now, now))
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows, then least-recently-used rows beyond max_entries."""
+        db = self._conn()
+        db.execute("delete from entries where created < ?", (time.time() - self.ttl,))
+        db.execute("delete from entries where key in (select key from entries order by accessed desc"
+                   " limit -1 offset ?)", (self.max_entries,))
+
+    def stats(self) -> dict:
+        db = self._conn()
+        out = dict(db.execute("select name, value from stats").fetchall())
+        out["entries"] = db.execute("select count(*) from entries").fetchone()[0]
+        return {"hits": out.get("hits", 0), "misses": out.get("misses", 0), "entries": out["entries"]}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> DiskCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache()
+        return _cache
+
+_MISSING = object()
+
+def disk_cached(namespace: str, key=None):
+    """Cache a function's JSON-serialisable result on disk. Exceptions are not cached.
+
+    `key`, if given, maps the call's arguments to the values that identify it
+    (e.g. a precomputed content hash instead of the raw bytes).
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            parts = key(*args, **kwargs) if key else (args, kwargs)
+            key_ = make_key(namespace, parts)
+            hit = cache.get(key_, _MISSING)
+            if hit is not _MISSING:
+                return hit
+            value = fn(*args, **kwargs)
+            cache.set(key_, value)
+            return value
+        return wrapper
+    return deco
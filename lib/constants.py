@@ -6,4 +6,51 @@ FRANCHISE_CANDIDATES = [
 
 POPULAR_CHARACTERS = {
     "Naruto": ["Naruto Uzumaki","Sasuke Uchiha","Sakura Haruno","Kakashi Hatake","Itachi Uchiha"],
+    "One Piece": ["Monkey D. Luffy","Roronoa Zoro","Nami","Sanji","Trafalgar Law"],
+    "Demon Slayer": ["Tanjiro Kamado","Nezuko Kamado","Zenitsu Agatsuma","Inosuke Hashibira","Kyojuro Rengoku"],
+    "Jujutsu Kaisen": ["Satoru Gojo","Yuji Itadori","Megumi Fushiguro","Nobara Kugisaki","Ryomen Sukuna"],
+    "Attack on Titan": ["Eren Yeager","Mikasa Ackerman","Levi Ackerman","Armin Arlert"],
+    "My Hero Academia": ["Izuku Midoriya","Katsuki Bakugo","Shoto Todoroki","All Might"],
+    "Chainsaw Man": ["Denji","Power","Makima","Aki Hayakawa"],
+    "Spy x Family": ["Loid Forger","Yor Forger","Anya Forger"],
+    "Genshin Impact": ["Raiden Shogun","Hu Tao","Zhongli","Venti","Ganyu"],
+}
+
+# Short forms and nicknames sellers use in titles; matched by the local classifier.
+FRANCHISE_ALIASES = {
+    "Naruto": ["shippuden","konoha","akatsuki","sharingan"],
+    "One Piece": ["straw hat","strawhat"],
+    "Demon Slayer": ["kimetsu","kny","nichirin"],
+    "Jujutsu Kaisen": ["jjk","jujutsu"],
+    "Attack on Titan": ["aot","shingeki","survey corps"],
+    "My Hero Academia": ["mha","bnha","boku no hero","ua uniform"],
+    "Genshin Impact": ["genshin"],
+    "Zelda": ["hyrule","link","master sword","tears of the kingdom","breath of the wild"],
+    "Final Fantasy": ["ff7","ffvii","buster sword","cloud strife","sephiroth"],
+    "Star Wars": ["lightsaber","jedi","sith","mandalorian","stormtrooper"],
+    "Marvel": ["avengers","spider-man","spiderman","iron man","mjolnir","loki"],
+    "DC": ["batman","superman","wonder woman","joker","harley quinn"],
+    "Harry Potter": ["hogwarts","gryffindor","slytherin","wand","hufflepuff","ravenclaw"],
+    "Chainsaw Man": ["csm"],
+    "Spy x Family": ["spy family","spyxfamily"],
+    "Sailor Moon": ["sailor","moon stick","usagi"],
+    "Dragon Ball": ["dbz","goku","vegeta","saiyan","dragonball"],
+    "Nier": ["nier automata","2b","9s","yorha"],
+    "Elden Ring": ["tarnished","malenia","ranni"],
+}
+
+# Keyword cues for the generic tag labels in lib.ai.TAG_LABELS.
+TAG_KEYWORDS = {
+    "anime": ["anime"],
+    "manga": ["manga","volume","tankobon"],
+    "cosplay": ["cosplay","cosplayer","convention","con"],
+    "prop": ["prop","replica","foam","eva foam","resin"],
+    "weapon": ["sword","katana","blade","axe","scythe","spear","bow","gun","staff","dagger","kunai","lightsaber"],
+    "costume": ["costume","outfit","uniform","kimono","haori","cloak","robe","jacket","dress","suit"],
+    "figure": ["figure","figurine","statue","nendoroid","funko"],
+    "collectible": ["collectible","limited","signed","merch","rare"],
+    "handmade": ["handmade","hand made","diy","crafted","3d printed","custom"],
+    "official": ["official","licensed","authentic","genuine"],
+    "wig": ["wig","hair"],
+    "accessory": ["headband","blindfold","mask","ring","necklace","earring","belt","gloves","lens","contacts"],
 }
@@ -0,0 +1,12 @@
+# lib/data
+# Typed rows and the queries every tab uses; UI modules don't build table() chains.
+from lib.data.models import (Listing, SavedSearch, Chat, Message, search_key, CARD_COLUMNS, DETAIL_COLUMNS,
+                             ALERT_COLUMNS, HISTORY_COLUMNS, INDEX_COLUMNS, CHAT_COLUMNS, MESSAGE_COLUMNS)
+from lib.data.listings import (PAGE_SIZE, MAX_RESULTS, search_listings, fetch_listings_page, get_listing,
+                               get_listings, index_rows, listing_corpus, latest_marker, recent_listings, listing_history,
+                               insert_listing, insert_listings, imported_refs, update_listing)
+from lib.data.images import IMAGE_COLUMNS, known_images, register_images, similar_images
+from lib.data.saved import (ALL_TYPES, load_saved_searches, invalidate_saved_searches, save_search,
+                            mark_seen, delete_saved_search)
+from lib.data.chats import (INBOX_PAGE, THREAD_PAGE, start_chat, inbox_page, chats_updated_since, latest_messages,
+                            older_messages, new_messages, send_message, mark_read, unread_count)
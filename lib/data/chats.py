@@ -0,0 +1,71 @@
+# lib/data/chats.py
+# Buyer–seller messaging. Every read is keyset-paginated, so a refresh costs the same
+# however long the thread or busy the inbox.
+from lib.data.models import Chat, Message, CHAT_COLUMNS, MESSAGE_COLUMNS
+
+INBOX_PAGE = 20
+THREAD_PAGE = 50
+
+# The gte/lte is implied by the or_, but only it can bound the (…, col) index scan.
+def _after(q, cursor, col):
+    ts, cid = cursor
+    return q.gte(col, ts).or_(f'{col}.gt."{ts}",and({col}.eq."{ts}",id.gt.{cid})')
+
+def _before(q, cursor, col):
+    ts, cid = cursor
+    return q.lte(col, ts).or_(f'{col}.lt."{ts}",and({col}.eq."{ts}",id.lt.{cid})')
+
+def _participant(q, uid):
+    return q.or_(f"buyer.eq.{uid},seller.eq.{uid}")
+
+def start_chat(sb, listing_id, buyer, seller) -> Chat:
+    """The buyer's chat about a listing, created on first contact."""
+    res = sb.table("chats").select(CHAT_COLUMNS).eq("listing", listing_id).eq("buyer", buyer).limit(1).execute()
+    if not res.data:
+        sb.table("chats").upsert({"listing": listing_id, "buyer": buyer, "seller": seller},
+                                 on_conflict="listing,buyer", ignore_duplicates=True).execute()
+        res = sb.table("chats").select(CHAT_COLUMNS).eq("listing", listing_id).eq("buyer", buyer).limit(1).execute()
+    return Chat.from_row(res.data[0])
+
+def inbox_page(sb, uid, before=None, limit=INBOX_PAGE):
+    """One page of the user's chats, most recently active first. Returns (chats, next_cursor)."""
+    q = _participant(sb.table("chats").select(CHAT_COLUMNS), uid)
+    if before:
+        q = _before(q, before, "updated_at")
+    rows = [Chat.from_row(r) for r in q.order("updated_at", desc=True).order("id", desc=True)
+            .limit(limit + 1).execute().data or []]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].cursor
+    return rows, None
+
+def chats_updated_since(sb, uid, since):
+    """Chats whose updated_at moved past `since` (a (updated_at, id) cursor): the inbox delta."""
+    q = _after(_participant(sb.table("chats").select(CHAT_COLUMNS), uid), since, "updated_at")
+    return [Chat.from_row(r) for r in q.order("updated_at").order("id").limit(100).execute().data or []]
+
+def latest_messages(sb, chat_id, limit=THREAD_PAGE):
+    """The newest `limit` messages of a thread, oldest first."""
+    rows = sb.table("messages").select(MESSAGE_COLUMNS).eq("chat", chat_id) \
+        .order("created_at", desc=True).order("id", desc=True).limit(limit).execute().data or []
+    return [Message.from_row(r) for r in reversed(rows)]
+
+def older_messages(sb, chat_id, before, limit=THREAD_PAGE):
+    q = _before(sb.table("messages").select(MESSAGE_COLUMNS).eq("chat", chat_id), before, "created_at")
+    rows = q.order("created_at", desc=True).order("id", desc=True).limit(limit).execute().data or []
+    return [Message.from_row(r) for r in reversed(rows)]
+
+def new_messages(sb, chat_id, after, limit=200):
+    """Messages after the (created_at, id) cursor, oldest first."""
+    q = _after(sb.table("messages").select(MESSAGE_COLUMNS).eq("chat", chat_id), after, "created_at")
+    return [Message.from_row(r) for r in q.order("created_at").order("id").limit(limit).execute().data or []]
+
+def send_message(sb, chat_id, sender, text) -> Message:
+    res = sb.table("messages").insert({"chat": chat_id, "sender": sender, "text": text}).execute()
+    return Message.from_row(res.data[0])
+
+def mark_read(sb, chat_id):
+    sb.rpc("mark_chat_read", {"p_chat": chat_id}).execute()
+
+def unread_count(sb) -> int:
+    return int(sb.rpc("unread_count", {}).execute().data or 0)
@@ -0,0 +1,21 @@
+# lib/data/images.py
+# The content-addressed `images` table: one row per distinct upload, keyed by sha256.
+IMAGE_COLUMNS = "sha256,dhash,renditions,width,height"
+
+def known_images(sb, shas):
+    """{sha256: row} for the hashes that are already stored."""
+    shas = sorted(set(shas))
+    if not shas:
+        return {}
+    rows = sb.table("images").select(IMAGE_COLUMNS).in_("sha256", shas).execute().data or []
+    return {r["sha256"]: r for r in rows}
+
+def register_images(sb, rows):
+    """Record newly uploaded images; a concurrent upload of the same bytes is a no-op."""
+    if rows:
+        sb.table("images").upsert(rows, on_conflict="sha256", ignore_duplicates=True).execute()
+
+def similar_images(sb, dhash, max_distance=6, limit=20):
+    """Stored images within `max_distance` bits of `dhash` (max 7), with the active listings using them."""
+    return sb.rpc("similar_images", {"p_dhash": int(dhash), "p_max_distance": int(max_distance),
+                                     "p_limit": int(limit)}).execute().data or []
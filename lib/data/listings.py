@@ -0,0 +1,143 @@
+# lib/data/listings.py
+# Every read and write of `listings` goes through here.
+from lib.data.models import Listing, CARD_COLUMNS, DETAIL_COLUMNS, ALERT_COLUMNS, HISTORY_COLUMNS, INDEX_COLUMNS
+from lib.qcache import LISTING_CACHE, listing_key, invalidate_listings
+
+PAGE_SIZE = 24
+MAX_RESULTS = 100   # cap on one search RPC page
+
+def _rows(res):
+    return [Listing.from_row(r) for r in (res.data or [])]
+
+def search_listings(sb, query, city=None, ltypes=None, since=None, limit=PAGE_SIZE, offset=0):
+    """Ranked, typo-tolerant search over title/franchise/character/tags, done in Postgres."""
+    params = {
+        "q": query,
+        "p_city": city or None,
+        "p_ltypes": list(ltypes) if ltypes else None,
+        "p_since": since,
+        "p_limit": min(int(limit), MAX_RESULTS),
+        "p_offset": int(offset),
+    }
+    return _rows(sb.rpc("search_listings", params).execute())
+
+def fetch_listings_page(sb, city=None, ltypes=None, text=None, cursor=None, limit=PAGE_SIZE):
+    """One page of active listings, keyset-paginated on (created_at, id) newest first.
+
+    With a text query the page comes from the ranked search RPC instead and the
+    cursor is a plain offset. Returns (rows, next_cursor); next_cursor is None on the last page.
+    Pages are served from the process-wide LISTING_CACHE, shared across sessions.
+    """
+    kind = "search" if text and text.strip() else "page"
+    key = listing_key(kind, city, ltypes, text, cursor, limit)
+    return LISTING_CACHE.get_or_load(key, lambda: _fetch_page(sb, city, ltypes, text, cursor, limit))
+
+def _fetch_page(sb, city, ltypes, text, cursor, limit):
+    if text and text.strip():
+        offset = cursor or 0
+        rows = search_listings(sb, text.strip(), city, ltypes, limit=limit + 1, offset=offset)
+        if len(rows) > limit:
+            return rows[:limit], offset + limit
+        return rows, None
+    q = sb.table("listings").select(CARD_COLUMNS).eq("status", "active")
+    if city: q = q.eq("city", city)
+    if ltypes: q = q.in_("ltype", ltypes)
+    if cursor:
+        ts, lid = cursor
+        # The lte is implied by the or_, but only it can bound the index scan.
+        q = q.lte("created_at", ts).or_(f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt.{lid})')
+    rows = _rows(q.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute())
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].cursor
+    return rows, None
+
+def get_listing(sb, listing_id):
+    rows = _rows(sb.table("listings").select(DETAIL_COLUMNS).eq("id", listing_id).limit(1).execute())
+    return rows[0] if rows else None
+
+def get_listings(sb, ids):
+    """Active listings (card projection) for `ids`, in the order given; missing ones are skipped."""
+    if not ids:
+        return []
+    rows = _rows(sb.table("listings").select(CARD_COLUMNS).eq("status", "active").in_("id", list(ids)).execute())
+    by_id = {r.id: r for r in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+def index_rows(sb, ids, chunk=200):
+    """Active listings (index projection) among `ids`; missing and inactive ones are left out."""
+    ids, out = list(ids), []
+    for i in range(0, len(ids), chunk):
+        q = sb.table("listings").select(INDEX_COLUMNS).eq("status", "active").in_("id", ids[i:i + chunk])
+        out += _rows(q.execute())
+    return out
+
+def listing_corpus(sb, since=None, chunk=1000):
+    """Yield active listings (index projection) in (created_at, id) order, a chunk at a time."""
+    cursor = None
+    while True:
+        q = sb.table("listings").select(INDEX_COLUMNS).eq("status", "active")
+        if cursor:
+            ts, lid = cursor     # the gte (implied by the or_, and past `since`) bounds the index scan
+            q = q.gte("created_at", ts).or_(f'created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{lid})')
+        elif since:
+            q = q.gte("created_at", since)
+        rows = _rows(q.order("created_at").order("id").limit(chunk).execute())
+        if rows:
+            yield rows
+        if len(rows) < chunk:
+            return
+        cursor = rows[-1].cursor
+
+def latest_marker(sb):
+    """(created_at, id) of the newest active listing — a one-row probe for 'anything new?'."""
+    rows = sb.table("listings").select("id,created_at").eq("status", "active") \
+        .order("created_at", desc=True).order("id", desc=True).limit(1).execute().data
+    return (rows[0]["created_at"], rows[0]["id"]) if rows else None
+
+def recent_listings(sb, since=None, limit=1000):
+    """Newest active listings (alert projection), optionally only those created since `since`."""
+    q = sb.table("listings").select(ALERT_COLUMNS).eq("status", "active")
+    if since: q = q.gte("created_at", since)
+    return _rows(q.order("created_at", desc=True).limit(limit).execute())
+
+def listing_history(sb, limit, active_only=True):
+    """franchise/character/tags of the newest listings, for the local classifier."""
+    q = sb.table("listings").select(HISTORY_COLUMNS)
+    if active_only: q = q.eq("status", "active")
+    return _rows(q.order("created_at", desc=True).limit(limit).execute())
+
+def insert_listing(sb, data: dict):
+    """Insert a listing and drop the cached pages it could appear in."""
+    res = sb.table("listings").insert(data).execute()
+    invalidate_listings(data.get("city"), data.get("ltype"))
+    return Listing.from_row(res.data[0]) if res.data else None
+
+def insert_listings(sb, rows: list) -> list:
+    """Insert a batch in one request; rows whose (owner, import_ref) already exists are skipped.
+
+    Returns the ids that were inserted.
+    """
+    if not rows:
+        return []
+    res = sb.table("listings").upsert(rows, on_conflict="owner,import_ref", ignore_duplicates=True).execute()
+    for city, ltype in {(r.get("city"), r.get("ltype")) for r in rows}:
+        invalidate_listings(city, ltype)
+    return [r["id"] for r in res.data or []]
+
+def imported_refs(sb, owner, refs, chunk=200) -> set:
+    """The subset of `refs` this owner has already imported."""
+    refs, found = list(refs), set()
+    for i in range(0, len(refs), chunk):
+        res = sb.table("listings").select("import_ref").eq("owner", owner).in_("import_ref", refs[i:i + chunk]).execute()
+        found.update(r["import_ref"] for r in res.data or [])
+    return found
+
+def update_listing(sb, listing_id, patch: dict):
+    """Patch a listing; raises LookupError if no row was updated (missing, or hidden by RLS)."""
+    res = sb.table("listings").update(patch).eq("id", listing_id).execute()
+    if not res.data:
+        raise LookupError(f"listing {listing_id} not found")
+    row = Listing.from_row(res.data[0])
+    invalidate_listings(row.city, row.ltype)
+    return row
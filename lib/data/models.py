@@ -0,0 +1,131 @@
+# lib/data/models.py
+# Typed, immutable rows. Instances are shared by every session through the listing
+# cache, so they are frozen; slots keep a cached page small.
+from dataclasses import dataclass, field
+
+# Named projections — select only what a view reads.
+CARD_COLUMNS = "id,title,thumb_url,price,price_unit,ltype,city,franchise,character,created_at"
+DETAIL_COLUMNS = CARD_COLUMNS + ",owner,description,tags,images,image_renditions,image_shas,quantity,status"
+ALERT_COLUMNS = "id,title,franchise,character,tags,city,ltype,created_at"
+HISTORY_COLUMNS = "franchise,character,tags"
+INDEX_COLUMNS = "id,owner,title,franchise,character,tags,created_at"
+CHAT_COLUMNS = "id,listing,buyer,seller,last_msg,updated_at,last_text,buyer_unread,seller_unread"
+MESSAGE_COLUMNS = "id,chat,sender,text,created_at"
+
+def search_key(*parts) -> str:
+    """Case-folded, whitespace-collapsed text used for matching and cache keys."""
+    return " ".join(" ".join(str(p) for p in parts if p).casefold().split())
+
+def _known(cls, row):
+    names = cls.__dataclass_fields__
+    return {k: v for k, v in row.items() if k in names and names[k].init}
+
+@dataclass(frozen=True, slots=True)
+class Listing:
+    id: str | None = None
+    title: str = ""
+    ltype: str = ""
+    price: int = 0
+    price_unit: str = "fixed"
+    city: str = ""
+    franchise: str = ""
+    character: str = ""
+    tags: tuple = ()
+    thumb_url: str | None = None
+    created_at: str | None = None
+    owner: str | None = None
+    description: str = ""
+    images: tuple = ()
+    image_renditions: tuple = ()
+    image_shas: tuple = ()
+    quantity: int = 1
+    status: str = "active"
+    rank: float | None = None
+    key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "key", search_key(self.title, self.franchise, self.character, *self.tags))
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Listing":
+        vals = _known(cls, row)
+        for name in ("tags", "images", "image_renditions", "image_shas"):
+            vals[name] = tuple(vals.get(name) or ())
+        for name in ("title", "ltype", "city", "franchise", "character", "description"):
+            vals[name] = vals.get(name) or ""
+        vals["price"] = int(vals.get("price") or 0)
+        return cls(**vals)
+
+    @property
+    def cursor(self):
+        """Keyset position of this row in the (created_at, id) feed order."""
+        return (self.created_at, self.id)
+
+    @property
+    def price_label(self) -> str:
+        return f"₹{self.price}" + ("/day" if self.price_unit == "day" else "")
+
+@dataclass(frozen=True, slots=True)
+class SavedSearch:
+    id: str | None = None
+    user_id: str | None = None
+    city: str | None = None
+    ltypes: tuple = ()
+    query: str = ""
+    last_seen: str | None = None
+    created_at: str | None = None
+    terms: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "terms", tuple(search_key(self.query).split()))
+
+    @classmethod
+    def from_row(cls, row: dict) -> "SavedSearch":
+        vals = _known(cls, row)
+        vals["ltypes"] = tuple(vals.get("ltypes") or ())
+        vals["query"] = vals.get("query") or ""
+        return cls(**vals)
+
+@dataclass(frozen=True, slots=True)
+class Chat:
+    id: str | None = None
+    listing: str | None = None
+    buyer: str | None = None
+    seller: str | None = None
+    last_msg: str | None = None
+    updated_at: str | None = None
+    last_text: str = ""
+    buyer_unread: int = 0
+    seller_unread: int = 0
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Chat":
+        vals = _known(cls, row)
+        vals["last_text"] = vals.get("last_text") or ""
+        return cls(**vals)
+
+    @property
+    def cursor(self):
+        return (self.updated_at, self.id)
+
+    def unread_for(self, uid) -> int:
+        return self.buyer_unread if uid == self.buyer else self.seller_unread if uid == self.seller else 0
+
+    def other(self, uid):
+        return self.seller if uid == self.buyer else self.buyer
+
+@dataclass(frozen=True, slots=True)
+class Message:
+    id: str | None = None
+    chat: str | None = None
+    sender: str | None = None
+    text: str = ""
+    created_at: str | None = None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Message":
+        return cls(**_known(cls, row))
+
+    @property
+    def cursor(self):
+        return (self.created_at, self.id)
@@ -0,0 +1,38 @@
+# lib/data/saved.py
+# Saved searches, cached per session until the user changes one.
+import datetime as dt
+import streamlit as st
+from lib.data.models import SavedSearch
+
+ALL_TYPES = ("rent", "sell", "commission")
+
+def load_saved_searches(sb, uid):
+    """A user's saved searches, kept in the session until one is added, viewed or deleted."""
+    cached = st.session_state.get("saved_searches_cache")
+    if cached and cached["uid"] == uid:
+        return cached["rows"]
+    res = sb.table("saved_searches").select("*").eq("user_id", uid).order("created_at", desc=True).execute()
+    rows = [SavedSearch.from_row(r) for r in (res.data or [])]
+    st.session_state["saved_searches_cache"] = {"uid": uid, "rows": rows}
+    return rows
+
+def invalidate_saved_searches():
+    st.session_state.pop("saved_searches_cache", None)
+
+def save_search(sb, uid, city=None, ltypes=None, query=""):
+    sb.table("saved_searches").insert({
+        "user_id": uid,
+        "city": city or None,
+        "ltypes": list(ltypes or ALL_TYPES),
+        "query": query or "",
+    }).execute()
+    invalidate_saved_searches()
+
+def mark_seen(sb, search_id):
+    sb.table("saved_searches").update({"last_seen": dt.datetime.now(dt.timezone.utc).isoformat()}) \
+        .eq("id", search_id).execute()
+    invalidate_saved_searches()
+
+def delete_saved_search(sb, search_id):
+    sb.table("saved_searches").delete().eq("id", search_id).execute()
+    invalidate_saved_searches()
@@ -0,0 +1,143 @@
+# lib/enrich.py
+# Post-publish enrichment: image renditions, caption, tags and franchise/character.
+# Publish inserts the listing as "enriching" and enqueues one job; a worker (inline
+# thread or `python -m tools.worker`) does the slow part and flips it to "active".
+import os, threading
+import streamlit as st
+
+from lib.ai import ai_backend, classify_batch, hf_caption, suggest_characters
+from lib.data import update_listing
+from lib.images import upload_images_to_storage, rendition_urls
+from lib.jobs import clear_spool, get_queue, run_worker, spool_files
+from lib.sb import has_service_credentials, service_client
+
+ENRICH_KIND = "enrich_listing"
+WORKER_BATCH = 8     # listings classified per zero-shot request
+
+def _spool_key(listing_id):
+    return f"enrich-{listing_id}"
+
+def enrichment_payload(listing_id, owner, uploads, fields: dict) -> dict:
+    """Job payload for a just-inserted listing; uploads are spooled to local disk."""
+    return {"listing_id": listing_id, "owner": owner,
+            "files": spool_files(_spool_key(listing_id), uploads or []), **fields}
+
+def enqueue_enrichment(payload) -> int:
+    return get_queue().enqueue(ENRICH_KIND, payload, key=f"enrich:{payload['listing_id']}")
+
+def _prepare(sb, p, strict=False):
+    """Per-listing steps; results land in the payload so a retry skips finished ones.
+
+    With `strict` (the worker) a failed Hugging Face call raises so the job is retried.
+    """
+    if "renditions" not in p:
+        p["renditions"] = upload_images_to_storage(p["files"], p["owner"], sb=sb) if p["files"] else []
+    if "caption" not in p:
+        caption = ""
+        if p["files"] and ai_backend() != "local":
+            with open(p["files"][0], "rb") as f:
+                caption = hf_caption(f.read(), strict=strict)
+        p["caption"] = caption
+
+def image_fields(r) -> dict:
+    """Listing columns for a list of upload_images_to_storage() results."""
+    return {"images": rendition_urls(r, "full", "jpg"), "image_renditions": r,
+            "thumb_url": r[0]["thumb"]["webp"] if r else None, "image_shas": [x["sha256"] for x in r]}
+
+def _context(p) -> str:
+    parts = (p.get("title"), p.get("franchise"), p.get("character"), p.get("description"), p.get("caption"))
+    return "\n".join(x for x in parts if x)[:1000]
+
+def _patches(payloads, strict=False):
+    """The listing update for each prepared payload; one classification call for the batch."""
+    results = classify_batch([_context(p) for p in payloads], refine=True, strict=strict)
+    out = []
+    for p, result in zip(payloads, results):
+        r = p["renditions"]
+        patch = {**image_fields(r), "status": "active"}
+        if not p.get("tags") and result["tags"]:
+            patch["tags"] = result["tags"]
+        franchise = p.get("franchise") or (result["franchises"] or [None])[0]
+        if not p.get("franchise") and franchise:
+            patch["franchise"] = franchise
+        if not p.get("character") and franchise:
+            chars = suggest_characters(franchise, _context(p), True)
+            if chars:
+                patch["character"] = chars[0]
+        out.append(patch)
+    return out
+
+def enrich_now(sb, payload):
+    """Run enrichment in the caller's session (no worker configured)."""
+    try:
+        _prepare(sb, payload)
+        update_listing(sb, payload["listing_id"], _patches([payload])[0])
+    finally:
+        clear_spool(_spool_key(payload["listing_id"]))
+
+def handle_enrich(jobs, queue, sb=None):
+    """Job handler: prepare each listing, classify the batch together, write results back."""
+    sb = sb or service_client()
+    ready = []
+    for job in jobs:
+        try:
+            _prepare(sb, job.payload, strict=True)
+            queue.checkpoint(job)
+            ready.append(job)
+        except Exception as e:
+            _failed(sb, queue, job, e)
+    if not ready:
+        return
+    try:
+        patches = _patches([j.payload for j in ready], strict=True)
+    except Exception as e:
+        for job in ready:
+            _failed(sb, queue, job, e)
+        return
+    for job, patch in zip(ready, patches):
+        try:
+            update_listing(sb, job.payload["listing_id"], patch)
+            queue.complete(job)
+            clear_spool(_spool_key(job.payload["listing_id"]))
+        except Exception as e:
+            _failed(sb, queue, job, e)
+
+def _failed(sb, queue, job, error):
+    queue.checkpoint(job)    # keep steps that finished (e.g. uploaded renditions) for the retry
+    if queue.fail(job, repr(error)):
+        return
+    # Out of retries: publish with whatever finished rather than leaving the listing hidden.
+    p = job.payload
+    patch = {"status": "active"}
+    if p.get("renditions"):
+        patch.update(image_fields(p["renditions"]))
+    try:
+        update_listing(sb, p["listing_id"], patch)
+    except Exception:
+        pass
+    clear_spool(_spool_key(p["listing_id"]))
+
+# ---------------------------------------------------------------- worker mode
+
+def worker_mode() -> str:
+    """"external" (tools.worker), "inline" (a thread in this process) or "off" (enrich during Publish).
+
+    Defaults to inline when service-role credentials are configured, otherwise off.
+    """
+    try:
+        mode = st.secrets.get("JOBS_WORKER", "")
+    except Exception:
+        mode = ""
+    mode = (mode or os.environ.get("JOBS_WORKER", "")).lower()
+    if mode in ("external", "inline", "off"):
+        return mode
+    return "inline" if has_service_credentials() else "off"
+
+@st.cache_resource(show_spinner=False)
+def start_inline_worker():
+    """One daemon worker thread per Streamlit process."""
+    stop = threading.Event()
+    thread = threading.Thread(target=run_worker, kwargs={"handlers": {ENRICH_KIND: handle_enrich},
+                              "batch": WORKER_BATCH, "stop": stop}, name="enrich-worker", daemon=True)
+    thread.start()
+    return stop
@@ -0,0 +1,101 @@
+# lib/hf.py
+# Shared Hugging Face Inference API client: one pooled session, per-model timeouts,
+# retries that respect "model loading" 503s, and a helper to run calls concurrently.
+import os, time, threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+import streamlit as st
+from lib.trace import span
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # older Streamlit
+    add_script_run_ctx = get_script_run_ctx = None
+
+API_URL = "https://api-inference.huggingface.co/models/"
+MODEL_TIMEOUTS = {
+    "meta-llama/Meta-Llama-3.1-8B-Instruct": 90,
+    "facebook/bart-large-mnli": 30,
+    "Salesforce/blip-image-captioning-base": 30,
+    "dslim/bert-base-NER": 15,
+}
+DEFAULT_TIMEOUT = 30
+MAX_RETRIES = 3
+MAX_WAIT = 20          # never sleep longer than this on a single estimated_time
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HFError(Exception):
+    pass
+
+_lock = threading.Lock()
+_session = None
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hf")
+
+def hf_token() -> str:
+    try:
+        token = st.secrets.get("HF_TOKEN", "")
+    except Exception:
+        token = ""
+    return token or os.environ.get("HF_TOKEN", "")
+
+def session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            _session = s
+        return _session
+
+def use_session(s):
+    """Swap the HTTP session (benchmarks point this at a local fake)."""
+    global _session
+    with _lock:
+        _session = s
+
+def _retry_wait(resp, fallback: float) -> float:
+    try:
+        est = float(resp.json().get("estimated_time", 0))
+    except Exception:
+        est = 0
+    return min(max(est, fallback), MAX_WAIT)
+
+def infer(model: str, *, json=None, data=None, headers=None, timeout=None, retries: int = MAX_RETRIES):
+    """POST to a hosted model and return the decoded JSON, raising HFError on failure."""
+    token = hf_token()
+    if not token:
+        raise HFError("HF_TOKEN is not configured")
+    hdrs = {"Authorization": f"Bearer {token}", **(headers or {})}
+    timeout = timeout or MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT)
+    delay = 1.0
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        try:
+            with span("hf", model):
+                r = session().post(API_URL + model, headers=hdrs, json=json, data=data, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last:
+                raise HFError(f"{model}: {e}") from e
+            time.sleep(delay); delay *= 2
+            continue
+        if r.status_code in RETRY_STATUSES and not last:
+            time.sleep(_retry_wait(r, delay)); delay *= 2
+            continue
+        if r.status_code >= 400:
+            raise HFError(f"{model}: HTTP {r.status_code}")
+        return r.json()
+
+def fan_out(calls: dict) -> dict:
+    """Run independent zero-arg callables concurrently; returns {name: result}."""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def _bind(fn):
+        def run():
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return fn()
+        return run
+
+    futures = {name: _pool.submit(_bind(fn)) for name, fn in calls.items()}
+    return {name: f.result() for name, f in futures.items()}
@@ -1,20 +1,106 @@
 # lib/images.py
-import io, uuid
-from PIL import Image
+import hashlib, io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
 from lib.sb import sb_client
+from lib.data import known_images, register_images
+from lib.trace import span, bind
 
-def upload_images_to_storage(files, owner_id):
-    """Uploads up to 5 images to Supabase Storage bucket 'listing-images' and returns public URLs."""
-    sb = sb_client()
-    urls = []
-    for f in (files or [])[:5]:
-        image = Image.open(f).convert("RGB")
-        buf = io.BytesIO()
-        image.save(buf, format="JPEG", quality=85)
-        buf.seek(0)
-        path = f"{owner_id}/{uuid.uuid4().hex}.jpg"
-        sb.storage.from_("listing-images").upload(
-            path, buf.getvalue(), {"content-type": "image/jpeg"}
-        )
-        urls.append(sb.storage.from_("listing-images").get_public_url(path))
-    return urls
+BUCKET = "listing-images"
+MAX_IMAGES = 5
+# rendition name -> longest side in px
+RENDITIONS = {"thumb": 320, "card": 720, "full": 1600}
+FORMATS = {"webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+           "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True})}
+UPLOAD_WORKERS = 8
+
+def _decode(f, max_side: int) -> Image.Image:
+    """Decode at most ~max_side px: JPEG draft mode skips DCT work, then EXIF rotation."""
+    image = Image.open(f)
+    if image.format == "JPEG":
+        image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return image
+
+def dhash(image: Image.Image) -> int:
+    """64-bit difference hash (signed, to fit a Postgres bigint): robust to resizing and re-encoding."""
+    small = image.convert("L").resize((9, 8), Image.LANCZOS)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    return bits - (1 << 64) if bits >= 1 << 63 else bits
+
+def render_renditions(f):
+    """([(rendition, ext, content_type, bytes)] for every size/format, dHash, (w, h)) of one image."""
+    if hasattr(f, "seek"):
+        f.seek(0)
+    with span("image", "decode"):
+        base = _decode(f, max(RENDITIONS.values()))
+    out = []
+    for name, side in RENDITIONS.items():
+        with span("image", f"encode:{name}"):
+            image = base if max(base.size) <= side else base.copy()
+            image.thumbnail((side, side), Image.LANCZOS)
+            for ext, (fmt, ctype, params) in FORMATS.items():
+                buf = io.BytesIO()
+                image.save(buf, format=fmt, **params)
+                out.append((name, ext, ctype, buf.getvalue()))
+    return out, dhash(base), base.size
+
+def _read(f) -> bytes:
+    if isinstance(f, str):
+        with open(f, "rb") as fh:
+            return fh.read()
+    return f.getvalue()
+
+def upload_images_to_storage(files, owner_id, sb=None):
+    """Uploads up to 5 images as thumb/card/full renditions (WebP + JPEG fallback) to Supabase Storage.
+
+    Storage is content-addressed: objects live under the sha256 of the original bytes, and
+    an image that is already in the `images` table is neither decoded nor uploaded again.
+    `files` are uploads or local paths. Returns one dict per image:
+    {"thumb": {"webp": url, "jpg": url}, "card": {...}, "full": {...}, "sha256": ..., "dhash": ...}.
+    """
+    files = (files or [])[:MAX_IMAGES]
+    if not files:
+        return []
+    sb = sb or sb_client()
+    bucket = sb.storage.from_(BUCKET)
+    blobs = [_read(f) for f in files]
+    shas = [hashlib.sha256(b).hexdigest() for b in blobs]
+    known = known_images(sb, shas)
+    todo = {sha: blob for sha, blob in zip(shas, blobs) if sha not in known}   # also dedups within the batch
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(todo))) as pool:
+            encoded = dict(zip(todo, pool.map(bind(render_renditions), (io.BytesIO(b) for b in todo.values()))))
+
+        jobs = [(sha, f"{sha[:2]}/{sha}/{name}.{ext}", name, ext, ctype, data)
+                for sha, (renditions, _, _) in encoded.items() for name, ext, ctype, data in renditions]
+
+        def _upload(job):
+            _, path, _, _, ctype, data = job
+            bucket.upload(path, data, {"content-type": ctype, "cache-control": "31536000", "upsert": "true"})
+            return bucket.get_public_url(path)
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+            urls = list(pool.map(bind(_upload), jobs))
+
+        new_rows = {sha: {"sha256": sha, "dhash": h, "width": size[0], "height": size[1],
+                          "first_owner": owner_id, "renditions": {}}
+                    for sha, (_, h, size) in encoded.items()}
+        for (sha, _, name, ext, _, _), url in zip(jobs, urls):
+            new_rows[sha]["renditions"].setdefault(name, {})[ext] = url
+        register_images(sb, list(new_rows.values()))
+        known.update(new_rows)
+
+    return [{**known[sha]["renditions"], "sha256": sha, "dhash": known[sha]["dhash"]} for sha in shas]
+
+def rendition_urls(renditions, size="full", ext="webp"):
+    """Flatten upload results to one URL per image, e.g. for the legacy `images` column."""
+    return [r[size][ext] for r in renditions if size in r and ext in r[size]]
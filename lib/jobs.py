@@ -0,0 +1,150 @@
+# lib/jobs.py
+# Durable local job queue. SQLite in WAL mode, shared by the Streamlit process and any
+# number of `python -m tools.worker` processes; claims are leased, so a crashed worker's
+# jobs are picked up again once the lease runs out.
+import json, os, shutil, sqlite3, threading, time, uuid
+from dataclasses import dataclass
+
+DEFAULT_PATH = os.environ.get("JOBS_PATH", ".cache/jobs.sqlite3")
+SPOOL_DIR = os.environ.get("JOBS_SPOOL_DIR", ".cache/spool")
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 300
+BACKOFF_BASE = 5.0      # seconds; doubles per failed attempt
+BACKOFF_MAX = 600.0
+
+@dataclass(slots=True)
+class Job:
+    id: int
+    kind: str
+    key: str
+    payload: dict
+    attempts: int
+
+class JobQueue:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = self._conn()
+        db.execute("create table if not exists jobs (id integer primary key, kind text not null,"
+                   " key text not null unique, payload text not null, status text not null default 'queued',"
+                   " attempts integer not null default 0, run_after real not null, leased_until real,"
+                   " last_error text, created real not null, updated real not null)")
+        db.execute("create index if not exists jobs_ready_idx on jobs(status, run_after)")
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("pragma journal_mode=wal")
+            db.execute("pragma synchronous=normal")
+            self._local.db = db
+        return db
+
+    def enqueue(self, kind: str, payload: dict, key: str = None) -> int:
+        """Add a job; a second enqueue with the same idempotency `key` returns the first job's id."""
+        db, now = self._conn(), time.time()
+        key = key or uuid.uuid4().hex
+        db.execute("insert into jobs(kind, key, payload, run_after, created, updated) values (?, ?, ?, ?, ?, ?)"
+                   " on conflict(key) do nothing", (kind, key, json.dumps(payload), now, now, now))
+        return db.execute("select id from jobs where key = ?", (key,)).fetchone()[0]
+
+    def claim(self, kinds=None, limit=1) -> list:
+        """Lease up to `limit` ready jobs (queued, or running with an expired lease)."""
+        db, now = self._conn(), time.time()
+        kinds = list(kinds or ())
+        where = "((status = 'queued' and run_after <= ?) or (status = 'running' and leased_until < ?))"
+        if kinds:
+            where += f" and kind in ({','.join('?' * len(kinds))})"
+        db.execute("begin immediate")
+        try:
+            rows = db.execute(f"select id, kind, key, payload, attempts from jobs where {where}"
+                              " order by run_after limit ?", (now, now, *kinds, limit)).fetchall()
+            db.executemany("update jobs set status = 'running', attempts = attempts + 1, leased_until = ?,"
+                           " updated = ? where id = ?", [(now + LEASE_SECONDS, now, r[0]) for r in rows])
+            db.execute("commit")
+        except BaseException:
+            db.execute("rollback")
+            raise
+        return [Job(i, k, key, json.loads(p), a + 1) for i, k, key, p, a in rows]
+
+    def checkpoint(self, job: Job):
+        """Persist `job.payload` mid-run so a retry can skip steps that already succeeded."""
+        self._conn().execute("update jobs set payload = ?, updated = ? where id = ?",
+                             (json.dumps(job.payload), time.time(), job.id))
+
+    def complete(self, job: Job):
+        self._conn().execute("update jobs set status = 'done', leased_until = null, last_error = null,"
+                             " updated = ? where id = ?", (time.time(), job.id))
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Record a failure. Returns True if the job will be retried, False if it is now dead."""
+        now = time.time()
+        retry = job.attempts < MAX_ATTEMPTS
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (job.attempts - 1))
+        self._conn().execute("update jobs set status = ?, run_after = ?, leased_until = null, last_error = ?,"
+                             " updated = ? where id = ?",
+                             ("queued" if retry else "failed", now + delay, error[:2000], now, job.id))
+        return retry
+
+    def stats(self) -> dict:
+        rows = self._conn().execute("select status, count(*) from jobs group by status").fetchall()
+        return {"queued": 0, "running": 0, "done": 0, "failed": 0, **dict(rows)}
+
+    def purge(self, older_than=7 * 86400) -> int:
+        """Drop finished jobs older than `older_than` seconds."""
+        cur = self._conn().execute("delete from jobs where status = 'done' and updated < ?",
+                                   (time.time() - older_than,))
+        return cur.rowcount
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+# ---------------------------------------------------------------- spool
+
+def spool_files(key: str, files) -> list:
+    """Copy uploads to the local spool so a worker can read them after the rerun ends."""
+    folder = os.path.join(SPOOL_DIR, key)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i, f in enumerate(files):
+        ext = os.path.splitext(getattr(f, "name", "") or "")[1].lower() or ".bin"
+        path = os.path.join(folder, f"{i}{ext}")
+        with open(path, "wb") as out:
+            out.write(f.getvalue())
+        paths.append(path)
+    return paths
+
+def clear_spool(key: str):
+    shutil.rmtree(os.path.join(SPOOL_DIR, key), ignore_errors=True)
+
+# ---------------------------------------------------------------- worker loop
+
+def run_worker(handlers: dict, batch=8, poll=2.0, once=False, stop=None, queue=None):
+    """Claim and run jobs until `stop` is set (or the queue is empty, with `once`).
+
+    `handlers` maps kind -> fn(jobs, queue); each handler gets up to `batch` jobs of its
+    kind at a time and is responsible for complete()/fail() on each of them.
+    """
+    queue = queue or get_queue()
+    while not (stop and stop.is_set()):
+        busy = False
+        for kind, handler in handlers.items():
+            jobs = queue.claim([kind], batch)
+            if jobs:
+                busy = True
+                handler(jobs, queue)
+        if not busy:
+            if once:
+                return
+            if stop:
+                stop.wait(poll)
+            else:
+                time.sleep(poll)
@@ -0,0 +1,114 @@
+# lib/local_ai.py
+# Offline franchise / character / tag suggestions: a weighted alias lexicon scored
+# TF-IDF style. Runs in well under a millisecond per call and never touches the network.
+import math, re
+from collections import Counter, defaultdict
+import streamlit as st
+
+from lib.constants import FRANCHISE_CANDIDATES, FRANCHISE_ALIASES, POPULAR_CHARACTERS, TAG_KEYWORDS
+from lib.sb import sb_client
+from lib.data import listing_history
+
+HISTORY_LIMIT = 5000     # newest listings mined for franchise/character/tag co-occurrence
+MAX_NGRAM = 3
+STOPWORDS = {"the","a","an","of","and","with","for","set","size","new","used","d","no","x"}
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _norm(phrase: str) -> str:
+    return " ".join(_WORD.findall((phrase or "").lower()))
+
+def _ngrams(text: str):
+    words = _WORD.findall((text or "").lower())
+    out = set()
+    for n in range(1, MAX_NGRAM + 1):
+        for i in range(len(words) - n + 1):
+            out.add(" ".join(words[i:i + n]))
+    return out
+
+class LocalClassifier:
+    def __init__(self):
+        self._raw = defaultdict(lambda: defaultdict(float))   # term -> {(kind, label): weight}
+        self._terms = {}                                      # term -> [((kind, label), weight * idf)]
+        self.roster = defaultdict(Counter)                    # franchise -> Counter(character)
+
+    def add(self, phrase, kind, label, weight=1.0):
+        term = _norm(phrase)
+        if term and term not in STOPWORDS:
+            self._raw[term][(kind, label)] += weight
+
+    def finalize(self):
+        labels = {lbl for postings in self._raw.values() for lbl in postings}
+        n = max(len(labels), 1)
+        self._terms = {
+            term: [(lbl, w * math.log(1 + n / len(postings))) for lbl, w in postings.items()]
+            for term, postings in self._raw.items()
+        }
+        self._raw = None
+        return self
+
+    def score(self, text, kind):
+        """[(label, score)] for one label kind, best first."""
+        scores = defaultdict(float)
+        for term in _ngrams(text):
+            for (k, label), w in self._terms.get(term, ()):
+                if k == kind:
+                    scores[label] += w
+        return sorted(scores.items(), key=lambda x: -x[1])
+
+    def franchises(self, text, k=5):
+        return [lbl for lbl, _ in self.score(text, "franchise")[:k]]
+
+    def tags(self, text, k=12):
+        found = [lbl for lbl, _ in self.score(text, "tag")]
+        found += [f for f in self.franchises(text, 2) if f not in found]
+        return found[:k]
+
+    def characters(self, franchise, text, k=10):
+        hits = dict(self.score(text, "character"))
+        roster = self.roster.get(franchise, Counter())
+        ranked = sorted(roster, key=lambda c: (-hits.get(c, 0), -roster[c]))
+        return ranked[:k]
+
+def _add_character(clf, franchise, name, weight):
+    clf.add(name, "franchise", franchise, 2.0 * weight)
+    clf.add(name, "character", name, 3.0 * weight)
+    for part in _WORD.findall(name.lower()):
+        if len(part) >= 4:
+            clf.add(part, "franchise", franchise, weight)
+            clf.add(part, "character", name, 1.5 * weight)
+
+def build_classifier(history_rows=()) -> LocalClassifier:
+    clf = LocalClassifier()
+    for f in FRANCHISE_CANDIDATES:
+        clf.add(f, "franchise", f, 3.0)
+    for f, aliases in FRANCHISE_ALIASES.items():
+        for a in aliases:
+            clf.add(a, "franchise", f, 2.0)
+    for f, chars in POPULAR_CHARACTERS.items():
+        for c in chars:
+            clf.roster[f][c] += 100   # curated names outrank mined ones
+            _add_character(clf, f, c, 1.0)
+    for tag, keywords in TAG_KEYWORDS.items():
+        clf.add(tag, "tag", tag, 2.0)
+        for kw in keywords:
+            clf.add(kw, "tag", tag, 1.0)
+    for row in history_rows:
+        f, ch, tags = row.franchise, row.character, row.tags
+        for t in tags:
+            clf.add(t, "tag", t, 0.5)
+            if f:
+                clf.add(t, "franchise", f, 0.3)
+        if f and ch:
+            clf.roster[f][ch] += 1
+            _add_character(clf, f, ch, 0.5)
+    return clf.finalize()
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def get_classifier() -> LocalClassifier:
+    """Process-wide classifier, rebuilt hourly to pick up new listing history."""
+    rows = []
+    try:
+        rows = listing_history(sb_client(), HISTORY_LIMIT)
+    except Exception:
+        pass
+    return build_classifier(rows)
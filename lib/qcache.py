@@ -0,0 +1,97 @@
+# lib/qcache.py
+# Process-wide TTL cache for listing queries. Shared by every session, bounded (LRU),
+# and coalescing: concurrent misses for the same key wait on a single fetch.
+import itertools, os, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class ResultCache:
+    def __init__(self, ttl: float = 20.0, max_entries: int = 512):
+        self.ttl, self.max_entries = ttl, max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()    # key -> (value, stored_at)
+        self._inflight = {}              # key -> (Future, generation of the load)
+        self._gen = itertools.count()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidated": 0, "served_age": 0.0}
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["served_age"] += now - entry[1]
+                return entry[0]
+            fut, gen = self._inflight.get(key, (None, None))
+            owner = fut is None
+            if owner:
+                fut, gen = Future(), next(self._gen)
+                self._inflight[key] = (fut, gen)
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if not owner:
+            return fut.result()
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                if self._inflight.get(key, (None, None))[1] == gen:
+                    del self._inflight[key]
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            # Invalidated while loading: the value may predate the write, so hand it to the
+            # callers already waiting but don't store it.
+            if self._inflight.get(key, (None, None))[1] == gen:
+                del self._inflight[key]
+                self._entries[key] = (value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        fut.set_result(value)
+        return value
+
+    def invalidate(self, predicate=None) -> int:
+        """Drop entries whose key satisfies `predicate(key)` (all entries if None).
+
+        Matching loads in flight are detached: they won't store, and later misses load afresh.
+        """
+        with self._lock:
+            doomed = [k for k in self._entries if predicate is None or predicate(k)]
+            for k in doomed:
+                del self._entries[k]
+            for k in [k for k in self._inflight if predicate is None or predicate(k)]:
+                del self._inflight[k]
+            self._stats["invalidated"] += len(doomed)
+        return len(doomed)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            s = dict(self._stats)
+            ages = [now - stored for _, stored in self._entries.values()]
+        lookups = s["hits"] + s["misses"] + s["coalesced"]
+        return {
+            "hits": s["hits"], "misses": s["misses"], "coalesced": s["coalesced"],
+            "invalidated": s["invalidated"], "entries": len(ages),
+            "hit_rate": round((s["hits"] + s["coalesced"]) / lookups, 3) if lookups else 0.0,
+            "mean_served_age_s": round(s["served_age"] / s["hits"], 2) if s["hits"] else 0.0,
+            "oldest_entry_age_s": round(max(ages), 2) if ages else 0.0,
+        }
+
+LISTING_CACHE = ResultCache(ttl=float(os.environ.get("BROWSE_CACHE_TTL", "20")),
+                            max_entries=int(os.environ.get("BROWSE_CACHE_ENTRIES", "512")))
+
+def listing_key(kind, city=None, ltypes=None, text=None, cursor=None, limit=None):
+    """Normalised cache key: ("page"|"search", city, sorted types, folded text, cursor, limit)."""
+    cursor = tuple(cursor) if isinstance(cursor, (list, tuple)) else cursor
+    return (kind, city or None, tuple(sorted(ltypes or ())), " ".join((text or "").lower().split()), cursor, limit)
+
+def invalidate_listings(city=None, ltype=None) -> int:
+    """Forget cached listing queries a new/changed listing in (city, ltype) could appear in."""
+    def affected(key):
+        _, k_city, k_types, _, _, _ = key
+        return (city is None or k_city in (None, city)) and (ltype is None or not k_types or ltype in k_types)
+    return LISTING_CACHE.invalidate(affected)
@@ -1,7 +1,95 @@
+import dataclasses, os, threading
+import httpx
 import streamlit as st
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from lib.trace import wrap_client
+
+# Process-wide counters: how many clients were built vs. handed out again.
+_STATS = {"opened": 0, "reused": 0}
+_LOCK = threading.Lock()
+_OPTION_FIELDS = {f.name for f in dataclasses.fields(ClientOptions)}
+_override = None
+
+def use_client(client):
+    """Route every sb_client()/session_client() call to `client` (benchmarks pass a local fake)."""
+    global _override
+    _override = client
+
+def _count(kind: str):
+    with _LOCK:
+        _STATS[kind] += 1
+
+def connection_stats() -> dict:
+    with _LOCK:
+        return dict(_STATS)
+
+def _new_client() -> Client:
+    cfg = st.secrets["supabase"]
+    timeout = float(cfg.get("timeout", 10))
+    opts = {"postgrest_client_timeout": timeout, "storage_client_timeout": int(timeout)}
+    # Newer supabase-py accepts a caller-owned httpx client; use it to control keep-alive.
+    if "httpx_client" in _OPTION_FIELDS:
+        opts["httpx_client"] = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=int(cfg.get("max_connections", 20)),
+                max_keepalive_connections=int(cfg.get("max_keepalive", 10)),
+                keepalive_expiry=float(cfg.get("keepalive_expiry", 30)),
+            ),
+        )
+    _count("opened")
+    return create_client(cfg["url"], cfg["anon_key"], options=ClientOptions(**opts))
+
+@st.cache_resource(show_spinner=False)
+def _shared_client() -> Client:
+    """Anonymous client shared by every session in this process."""
+    return _new_client()
+
+def anon_client() -> Client:
+    """The shared anonymous client whatever session is running: for process-wide caches and
+    indexes, so what they hold never depends on one user's credentials (RLS)."""
+    if _override is not None:
+        return wrap_client(_override)
+    return wrap_client(_shared_client())
+
+def session_client() -> Client:
+    """Client owned by this browser session; auth flows run on it so tokens never leak across users."""
+    if _override is not None:
+        return wrap_client(_override)
+    client = st.session_state.get("_sb_client")
+    if client is None:
+        client = _new_client()
+        st.session_state["_sb_client"] = client
+    else:
+        _count("reused")
+    return wrap_client(client)
 
 def sb_client() -> Client:
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["anon_key"]
+    """The signed-in session's client if there is one, else the shared anonymous client."""
+    if _override is not None:
+        return wrap_client(_override)
+    if st.session_state.get("_sb_client") is not None:
+        return session_client()
+    opened = connection_stats()["opened"]
+    client = _shared_client()
+    if connection_stats()["opened"] == opened:
+        _count("reused")
+    return wrap_client(client)
+
+def _service_config():
+    try:
+        cfg = dict(st.secrets["supabase"])
+    except Exception:
+        cfg = {}
+    return os.environ.get("SUPABASE_URL") or cfg.get("url"), os.environ.get("SUPABASE_SERVICE_KEY") or cfg.get("service_key")
+
+def has_service_credentials() -> bool:
+    return all(_service_config())
+
+def service_client() -> Client:
+    """Service-role client for offline jobs (CLI tools, job worker); bypasses RLS, never use it in the UI."""
+    url, key = _service_config()
+    if not url or not key:
+        raise RuntimeError("Set SUPABASE_URL and SUPABASE_SERVICE_KEY (or supabase.service_key in secrets).")
+    _count("opened")
     return create_client(url, key)
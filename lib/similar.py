@@ -0,0 +1,279 @@
+# lib/similar.py
+# "Similar props" and duplicate detection: TF-IDF over title, franchise, character and
+# tags, held in NumPy arrays behind an inverted index. Listings are added one at a time
+# (publish, periodic refresh); only document norms are recomputed, and only when the
+# corpus has grown enough for IDF to drift. Each refresh also re-reads a slice of the
+# indexed listings, so paused, sold-out, deleted and edited ones drop out or are re-indexed;
+# the rows they leave behind are compacted away once they make up a fifth of the index.
+import datetime as dt, math, re, threading, time
+import numpy as np
+import streamlit as st
+from dateutil.parser import isoparse
+
+from lib.data import index_rows, listing_corpus, search_key
+from lib.sb import anon_client
+
+FIELD_WEIGHTS = {"title": 1.0, "franchise": 1.5, "character": 1.5, "tags": 1.0}
+RENORM_GROWTH = 0.05       # recompute norms once the corpus grows 5% past the last pass
+REFRESH_SECONDS = 60
+REFRESH_LOOKBACK = 900     # re-read this many seconds before the newest row seen (late activations)
+VERIFY_BATCH = 1000        # indexed listings re-checked per refresh, round-robin
+COMPACT_DEAD = 0.2         # renumber rows once this share are tombstones (edits, removals)
+COMPACT_MIN = 256
+DUPLICATE_THRESHOLD = 0.85
+_TOKEN = re.compile(r"[^\W_]{2,}")
+
+def features(title="", franchise="", character="", tags=()) -> dict:
+    """{token: sublinear weighted term frequency} for one listing."""
+    raw = {}
+    for name, text in (("title", title), ("franchise", franchise), ("character", character),
+                       ("tags", " ".join(tags or ()))):
+        for tok in _TOKEN.findall(search_key(text)):
+            raw[tok] = raw.get(tok, 0.0) + FIELD_WEIGHTS[name]
+    return {t: 1.0 + math.log(w) if w >= 1 else w for t, w in raw.items()}
+
+def _sig(owner, title, franchise, character, tags) -> int:
+    return hash((owner, title, franchise, character, tuple(tags or ())))
+
+def _grow(arr, size, fill):
+    if size <= len(arr):
+        return arr
+    out = np.full(max(size, 2 * len(arr), 64), fill, dtype=arr.dtype)
+    out[:len(arr)] = arr
+    return out
+
+class SimilarityIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.vocab = {}                      # token -> term id
+        self._df = np.zeros(0, np.int32)
+        self._post_rows, self._post_w = [], []   # term id -> list of (row, weight)
+        self._frozen = {}                    # term id -> (rows array, weights array)
+        self._row_terms, self._row_w = [], []
+        self.ids, self._row = [], {}         # row -> listing id, listing id -> row
+        self._owner_codes, self._owners = np.zeros(0, np.int32), {}
+        self._alive = np.zeros(0, bool)
+        self._norms = np.zeros(0, np.float32)
+        self._n_alive, self._norm_n = 0, 0
+        self._sigs, self._verify_pos = {}, 0     # listing id -> _sig of the indexed fields
+        self.cursor, self.refreshed = None, 0.0
+
+    def __len__(self):
+        return self._n_alive
+
+    def __contains__(self, listing_id):
+        row = self._row.get(listing_id)
+        return row is not None and self._alive[row]
+
+    def _idf(self):
+        return (np.log((1.0 + self._n_alive) / (1.0 + self._df)) + 1.0).astype(np.float32)
+
+    def add(self, listing_id, owner=None, title="", franchise="", character="", tags=(), renorm=True):
+        """Index (or re-index) one listing. Bulk loaders pass renorm=False and call _renorm() once."""
+        feats = features(title, franchise, character, tags)
+        with self._lock:
+            self.remove(listing_id)
+            row = len(self.ids)
+            terms = np.empty(len(feats), np.int32)
+            weights = np.fromiter(feats.values(), np.float32, len(feats))
+            for i, tok in enumerate(feats):
+                t = self.vocab.get(tok)
+                if t is None:
+                    t = self.vocab[tok] = len(self.vocab)
+                    self._post_rows.append([]); self._post_w.append([])
+                    self._df = _grow(self._df, t + 1, 0)
+                terms[i] = t
+                self._df[t] += 1
+                self._post_rows[t].append(row); self._post_w[t].append(weights[i])
+                self._frozen.pop(t, None)
+            self.ids.append(listing_id)
+            self._row[listing_id] = row
+            self._sigs[listing_id] = _sig(owner, title, franchise, character, tags)
+            self._row_terms.append(terms); self._row_w.append(weights)
+            code = self._owners.setdefault(owner, len(self._owners))
+            self._owner_codes = _grow(self._owner_codes, row + 1, -1)
+            self._owner_codes[row] = code
+            self._alive = _grow(self._alive, row + 1, False)
+            self._alive[row] = True
+            self._n_alive += 1
+            self._norms = _grow(self._norms, row + 1, 0.0)
+            if renorm and self._n_alive > self._norm_n * (1 + RENORM_GROWTH):
+                self._renorm()
+            else:
+                self._norms[row] = np.linalg.norm(weights * self._idf()[terms])
+
+    def remove(self, listing_id):
+        with self._lock:
+            row = self._row.pop(listing_id, None)
+            self._sigs.pop(listing_id, None)
+            if row is None or not self._alive[row]:
+                return
+            self._alive[row] = False
+            self._n_alive -= 1
+            self._df[self._row_terms[row]] -= 1
+            dead = len(self.ids) - self._n_alive
+            if dead >= COMPACT_MIN and dead > COMPACT_DEAD * len(self.ids):
+                self._compact()
+
+    def _compact(self):
+        """Drop tombstoned rows and renumber the live ones; postings are rebuilt from the rows."""
+        n = len(self.ids)
+        keep = np.flatnonzero(self._alive[:n])
+        self.ids = [self.ids[i] for i in keep]
+        self._row = {lid: r for r, lid in enumerate(self.ids)}
+        self._row_terms = [self._row_terms[i] for i in keep]
+        self._row_w = [self._row_w[i] for i in keep]
+        self._owner_codes = self._owner_codes[keep]
+        self._norms = self._norms[keep]
+        self._alive = np.ones(len(keep), bool)
+        self._post_rows = [[] for _ in self.vocab]
+        self._post_w = [[] for _ in self.vocab]
+        for row, (terms, weights) in enumerate(zip(self._row_terms, self._row_w)):
+            for t, w in zip(terms.tolist(), weights.tolist()):
+                self._post_rows[t].append(row); self._post_w[t].append(w)
+        self._frozen.clear()
+        self._renorm()
+
+    def _renorm(self):
+        n = len(self.ids)
+        lengths = np.fromiter((len(t) for t in self._row_terms), np.int64, n)
+        if not lengths.sum():
+            return
+        terms, weights = np.concatenate(self._row_terms), np.concatenate(self._row_w)
+        sq = (weights * self._idf()[terms]) ** 2
+        row_of = np.repeat(np.arange(n), lengths)
+        self._norms[:n] = np.sqrt(np.bincount(row_of, weights=sq, minlength=n))
+        self._norm_n = self._n_alive
+
+    def _postings(self, t):
+        hit = self._frozen.get(t)
+        if hit is None:
+            hit = self._frozen[t] = (np.asarray(self._post_rows[t], np.int64), np.asarray(self._post_w[t], np.float32))
+        return hit
+
+    def _rank(self, terms, qweights, qnorm, k, exclude_row=None, owner=None, min_score=0.0):
+        """Cosine scores for a query vector (term ids, idf-weighted values) via the postings."""
+        n = len(self.ids)
+        if not n or not len(terms) or qnorm <= 0:
+            return []
+        idf = self._idf()
+        rows, vals = [], []
+        for t, qw in zip(terms, qweights):
+            r, pw = self._postings(t)
+            rows.append(r); vals.append(pw * (qw * idf[t]))
+        scores = np.bincount(np.concatenate(rows), weights=np.concatenate(vals), minlength=n)
+        norms = self._norms[:n]
+        scores = np.divide(scores, norms * qnorm, out=np.zeros(n), where=norms > 0)
+        scores[~self._alive[:n]] = 0.0
+        if owner is not None:
+            code = self._owners.get(owner, -2)
+            scores[self._owner_codes[:n] != code] = 0.0
+        if exclude_row is not None:
+            scores[exclude_row] = 0.0
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], min(float(scores[i]), 1.0)) for i in top if scores[i] > min_score]
+
+    def query(self, feats: dict, k=8, owner=None, min_score=0.0):
+        """[(listing_id, cosine)] best first. `owner` restricts matches to one seller's listings."""
+        with self._lock:
+            idf = self._idf()
+            unseen = math.log(1.0 + self._n_alive) + 1.0
+            terms, qweights, qsq = [], [], 0.0
+            for tok, w in feats.items():
+                t = self.vocab.get(tok)
+                qw = w * (idf[t] if t is not None else unseen)
+                qsq += qw * qw
+                if t is not None:
+                    terms.append(t); qweights.append(qw)
+            return self._rank(terms, qweights, math.sqrt(qsq), k, owner=owner, min_score=min_score)
+
+    def similar_to(self, listing_id, k=8):
+        """[(listing_id, cosine)] of the listings closest to an indexed one."""
+        with self._lock:
+            row = self._row.get(listing_id)
+            if row is None:
+                return []
+            terms = self._row_terms[row]
+            qweights = self._row_w[row] * self._idf()[terms]
+            return self._rank(terms, qweights, float(np.linalg.norm(qweights)), k, exclude_row=row)
+
+    def _stale(self, r) -> bool:
+        return self._sigs.get(r.id) != _sig(r.owner, r.title, r.franchise, r.character, r.tags)
+
+    def add_rows(self, rows):
+        with self._lock:
+            for r in rows:
+                self.add(r.id, r.owner, r.title, r.franchise, r.character, r.tags, renorm=False)
+                if self.cursor is None or r.cursor > self.cursor:
+                    self.cursor = r.cursor
+            if self._n_alive > self._norm_n * (1 + RENORM_GROWTH):
+                self._renorm()
+
+    def refresh(self, sb, force=False):
+        """Pull listings newer than the last one seen (with a lookback for late activations)."""
+        if not force and time.time() - self.refreshed < REFRESH_SECONDS:
+            return 0
+        self.refreshed = time.time()
+        since = None
+        if self.cursor:
+            since = (isoparse(self.cursor[0]) - dt.timedelta(seconds=REFRESH_LOOKBACK)).isoformat()
+        added = 0
+        for batch in listing_corpus(sb, since):
+            fresh = [r for r in batch if self._stale(r)]
+            self.add_rows(fresh)
+            added += len(fresh)
+        if since:       # a full load has nothing to re-check
+            self.verify(sb)
+        return added
+
+    def verify(self, sb, limit=VERIFY_BATCH) -> int:
+        """Re-read the next `limit` indexed listings: drop those no longer active, re-index edited ones."""
+        with self._lock:
+            ids = list(self._row)
+            if not ids:
+                return 0
+            start = self._verify_pos % len(ids)
+            batch = ids[start:start + limit]
+            self._verify_pos = start + len(batch)
+        found = {r.id: r for r in index_rows(sb, batch)}
+        changed = 0
+        with self._lock:
+            for lid in batch:
+                r = found.get(lid)
+                if r is None:
+                    changed += lid in self
+                    self.remove(lid)
+                elif self._stale(r):
+                    self.add(r.id, r.owner, r.title, r.franchise, r.character, r.tags)
+                    changed += 1
+        return changed
+
+@st.cache_resource(ttl=24 * 3600, show_spinner=False)
+def _build_index() -> SimilarityIndex:
+    index = SimilarityIndex()
+    index.refresh(anon_client(), force=True)
+    return index
+
+def get_index() -> SimilarityIndex:
+    """Process-wide index, rebuilt daily and topped up with new listings every minute."""
+    index = _build_index()
+    try:
+        index.refresh(anon_client())
+    except Exception:
+        pass
+    return index
+
+def similar_listings(listing, k=8):
+    """[(listing_id, score)] of the listings most like `listing` (a Listing)."""
+    index = get_index()
+    if listing.id in index:
+        return index.similar_to(listing.id, k)
+    feats = features(listing.title, listing.franchise, listing.character, listing.tags)
+    return [(i, sc) for i, sc in index.query(feats, k + 1) if i != listing.id][:k]
+
+def near_duplicates(owner, title, franchise="", character="", tags=(), k=3):
+    """The seller's own listings that look like the same prop as this draft."""
+    feats = features(title, franchise, character, tags)
+    return get_index().query(feats, k, owner=owner, min_score=DUPLICATE_THRESHOLD)
@@ -0,0 +1,232 @@
+# lib/suggest.py
+# Search suggestions: franchises, characters, tags and popular titles in one sorted array
+# of (key, term) pairs, one key per word start, so a prefix lookup is two bisects and no
+# database call. Built once per process from lib.constants and the listing corpus (in a
+# background thread started at app startup; no suggestions until it finishes), then topped
+# up with listings newer than the last one seen; terms rank by listing count. Each top-up
+# also re-reads a slice of the counted listings, so edits move their counts and paused,
+# sold-out or deleted listings stop counting.
+import bisect, datetime as dt, heapq, threading, time
+from dataclasses import dataclass, replace
+import streamlit as st
+from dateutil.parser import isoparse
+
+from lib.constants import FRANCHISE_CANDIDATES, POPULAR_CHARACTERS, TAG_KEYWORDS
+from lib.data import index_rows, listing_corpus, search_key
+from lib.sb import anon_client
+
+KIND_RANK = {"franchise": 0, "character": 1, "tag": 2, "title": 3}
+MIN_PREFIX = 2
+SUGGEST_COUNT = 6
+TITLE_MIN_COUNT = 2     # a title is suggested once this many listings share it
+MEMO_MAX = 4096
+REFRESH_SECONDS = 60
+REFRESH_LOOKBACK = 900
+VERIFY_BATCH = 1000     # counted listings re-checked per refresh, round-robin
+_END = "\U0010ffff"
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    text: str
+    kind: str
+    count: int
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._terms = []          # term id -> [text, kind, listing count]
+        self._ids = {}            # (kind, key) -> term id
+        self._keys = []           # sorted (key suffix starting at a word, term id)
+        self._titles = {}         # title key -> count, until it reaches TITLE_MIN_COUNT
+        self._const = set()       # term ids from lib.constants, suggested even with no listings
+        self._seen = {}           # listing id -> (_sig, what _tally counted for it)
+        self._verify_pos = 0
+        self._memo = {}
+        self.cursor, self.refreshed = None, 0.0
+        self.ready = False        # set once the corpus has been loaded
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _add(self, text, kind, n, pending):
+        key = search_key(text)
+        if not key:
+            return None
+        tid = self._ids.get((kind, key))
+        if tid is None:
+            tid = self._ids[(kind, key)] = len(self._terms)
+            self._terms.append([" ".join(str(text).split()), kind, 0])
+            words = key.split()
+            pending.extend((" ".join(words[i:]), tid) for i in range(len(words)))
+        self._terms[tid][2] += n
+        return tid
+
+    def _commit(self, pending):
+        if pending:
+            self._keys.extend(pending)
+            self._keys.sort()     # appended tail on a sorted list: timsort merges it in O(n)
+        self._memo.clear()
+
+    def add_constants(self):
+        with self._lock:
+            pending = []
+            for f in FRANCHISE_CANDIDATES:
+                self._add(f, "franchise", 0, pending)
+            for chars in POPULAR_CHARACTERS.values():
+                for c in chars:
+                    self._add(c, "character", 0, pending)
+            for t in TAG_KEYWORDS:
+                self._add(t, "tag", 0, pending)
+            self._const.update(range(len(self._terms)))
+            self._commit(pending)
+
+    def _tally(self, r, pending) -> tuple:
+        """Count one listing; returns (term ids, title key) for _untally to take back."""
+        tids = [self._add(r.franchise, "franchise", 1, pending), self._add(r.character, "character", 1, pending)]
+        tids += [self._add(t, "tag", 1, pending) for t in r.tags]
+        tkey = search_key(r.title)
+        tid = self._ids.get(("title", tkey))
+        if tid is not None:
+            self._terms[tid][2] += 1
+        elif tkey:
+            n = self._titles[tkey] = self._titles.get(tkey, 0) + 1
+            if n >= TITLE_MIN_COUNT:
+                del self._titles[tkey]
+                self._add(r.title, "title", n, pending)
+        return tuple(t for t in tids if t is not None), tkey
+
+    def _untally(self, counted):
+        tids, tkey = counted
+        for tid in tids:
+            self._terms[tid][2] -= 1
+        tid = self._ids.get(("title", tkey))
+        if tid is not None:
+            self._terms[tid][2] -= 1
+        elif tkey in self._titles:
+            self._titles[tkey] -= 1
+            if not self._titles[tkey]:
+                del self._titles[tkey]
+
+    def add_rows(self, rows):
+        """Count the franchise, character, tags and title of listings (Listing rows).
+
+        A listing counted before is an update: its old terms are taken back first.
+        """
+        with self._lock:
+            pending = []
+            for r in rows:
+                sig = hash((r.title, r.franchise, r.character, tuple(r.tags)))
+                old = self._seen.get(r.id)
+                if old is None or old[0] != sig:
+                    if old is not None:
+                        self._untally(old[1])
+                    self._seen[r.id] = (sig, self._tally(r, pending))
+                if self.cursor is None or r.cursor > self.cursor:
+                    self.cursor = r.cursor
+            self._commit(pending)
+
+    def remove(self, listing_id):
+        """Stop counting a listing (paused, sold out or deleted)."""
+        with self._lock:
+            old = self._seen.pop(listing_id, None)
+            if old is not None:
+                self._untally(old[1])
+                self._memo.clear()
+
+    def lookup(self, prefix, k=SUGGEST_COUNT) -> list:
+        """[Suggestion] whose text has a word starting with `prefix`, most listed first."""
+        key = search_key(prefix)
+        if len(key) < MIN_PREFIX or not self.ready:
+            return []
+        with self._lock:
+            hit = self._memo.get((key, k))
+            if hit is None:
+                lo = bisect.bisect_left(self._keys, (key,))
+                hi = bisect.bisect_left(self._keys, (key + _END,), lo)
+                terms, const = self._terms, self._const
+                tids = {tid for _, tid in self._keys[lo:hi] if terms[tid][2] > 0 or tid in const}
+                best = heapq.nsmallest(k, tids, key=lambda t: (-terms[t][2], KIND_RANK[terms[t][1]], len(terms[t][0])))
+                hit = [Suggestion(*terms[t]) for t in best]
+                if len(self._memo) >= MEMO_MAX:
+                    self._memo.clear()
+                self._memo[(key, k)] = hit
+            return hit
+
+    def complete(self, text, k=SUGGEST_COUNT) -> list:
+        """Suggestions for a partly typed query: matches for all of it, then for its last word."""
+        out = self.lookup(text, k)
+        head, _, last = text.strip().rpartition(" ")
+        if head and len(out) < k:
+            # Only terms that start with the last word, and no titles: "naruto ka" -> "naruto katana".
+            have, last = {search_key(s.text) for s in out}, search_key(last)
+            for s in self.lookup(last, 4 * k):
+                full = replace(s, text=f"{head} {s.text}")
+                if (s.kind != "title" and search_key(s.text).startswith(last)
+                        and search_key(full.text) not in have and len(out) < k):
+                    out.append(full)
+        return out
+
+    def refresh(self, sb, force=False):
+        """Count listings newer than the last one seen (with a lookback for late activations)."""
+        if not force and time.time() - self.refreshed < REFRESH_SECONDS:
+            return 0
+        self.refreshed = time.time()
+        since = None
+        if self.cursor:
+            since = (isoparse(self.cursor[0]) - dt.timedelta(seconds=REFRESH_LOOKBACK)).isoformat()
+        added = 0
+        for batch in listing_corpus(sb, since):
+            before = len(self._seen)
+            self.add_rows(batch)
+            added += len(self._seen) - before
+        if since:       # a full load has nothing to re-check
+            self.verify(sb)
+        return added
+
+    def verify(self, sb, limit=VERIFY_BATCH) -> int:
+        """Re-read the next `limit` counted listings: uncount those no longer active, recount edits."""
+        with self._lock:
+            ids = list(self._seen)
+            if not ids:
+                return 0
+            start = self._verify_pos % len(ids)
+            batch = ids[start:start + limit]
+            self._verify_pos = start + len(batch)
+        found = {r.id: r for r in index_rows(sb, batch)}
+        gone = [lid for lid in batch if lid not in found]
+        for lid in gone:
+            self.remove(lid)
+        self.add_rows(found.values())
+        return len(gone)
+
+def _load(index, sb):
+    try:
+        index.refresh(sb, force=True)
+    except Exception:
+        pass
+    index.ready = True
+
+@st.cache_resource(ttl=24 * 3600, show_spinner=False)
+def _build_index() -> SuggestIndex:
+    """Returns at once; the corpus (~1s, a dozen requests at 10k listings) loads in a thread."""
+    index = SuggestIndex()
+    index.add_constants()
+    threading.Thread(target=_load, args=(index, anon_client()), name="suggest-index", daemon=True).start()
+    return index
+
+def warm_suggestions():
+    """Start loading the index if this process hasn't yet (call at app startup)."""
+    _build_index()
+
+def get_suggester() -> SuggestIndex:
+    """Process-wide index, rebuilt daily and topped up with new listings every minute."""
+    index = _build_index()
+    if index.ready:
+        try:
+            index.refresh(anon_client())
+        except Exception:
+            pass
+    return index
+
+def suggest(text, k=SUGGEST_COUNT) -> list:
+    return get_suggester().complete(text, k)
@@ -0,0 +1,196 @@
+# lib/trace.py
+# Opt-in timing spans for backend, AI and image work, grouped per rerun and per session.
+# Enable with RENTACOS_TRACE=1 (or TRACE = true in secrets). When off, span() hands back
+# a shared no-op context manager and sb_client() returns the raw client.
+import collections, contextlib, json, os, threading, time
+import streamlit as st
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # older Streamlit
+    get_script_run_ctx = None
+
+EXPORT_DIR = os.environ.get("TRACE_EXPORT_DIR", ".cache")
+EXPORT_MAX_BYTES = int(os.environ.get("TRACE_EXPORT_MAX_BYTES", 5 * 2**20))   # then trace.jsonl -> trace.jsonl.1
+HISTORY = 20            # finished reruns kept per session for the debug panel
+
+_enabled = None
+_lock = threading.Lock()
+_local = threading.local()
+_active = {}                                             # session id -> Trace in progress
+_history = collections.defaultdict(lambda: collections.deque(maxlen=HISTORY))
+_totals = collections.defaultdict(lambda: [0, 0.0])      # (kind, name) -> [count, seconds]
+_NULL = contextlib.nullcontext()
+
+def enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        flag = os.environ.get("RENTACOS_TRACE", "")
+        if not flag:
+            try:
+                flag = str(st.secrets.get("TRACE", ""))
+            except Exception:
+                flag = ""
+        _enabled = flag.lower() in ("1", "true", "yes", "on")
+    return _enabled
+
+class Trace:
+    __slots__ = ("session", "rerun", "thread", "started", "duration", "spans")
+
+    def __init__(self, session, rerun):
+        self.session, self.rerun = session, rerun
+        self.thread = threading.current_thread().name     # the script thread; other spans ran in pools
+        self.started, self.duration, self.spans = time.perf_counter(), None, []
+
+    def to_dict(self):
+        return {"session": self.session, "rerun": self.rerun, "thread": self.thread, "duration_ms": round((self.duration or 0) * 1000, 2),
+                "spans": [{"kind": k, "name": n, "start_ms": round(s * 1000, 2), "ms": round(d * 1000, 2),
+                           "thread": t, **({"error": e} if e else {})} for k, n, s, d, t, e in self.spans]}
+
+def _session_id():
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return getattr(ctx, "session_id", None) or "local"
+
+def current():
+    return getattr(_local, "trace", None) or _active.get(_session_id())
+
+def begin_rerun():
+    """Start a trace for this script run (call at the top of app.py)."""
+    if not enabled():
+        return None
+    sid = _session_id()
+    with _lock:
+        unfinished = _active.pop(sid, None)
+        rerun = (unfinished.rerun + 1) if unfinished else (_history[sid][-1].rerun + 1 if _history[sid] else 1)
+        if unfinished:   # st.rerun()/st.stop() skipped end_rerun()
+            _finish(unfinished)
+        tr = _active[sid] = Trace(sid, rerun)
+    _local.trace = tr
+    return tr
+
+def end_rerun():
+    """Close the current rerun's trace and export it. Returns the finished Trace."""
+    if not enabled():
+        return None
+    sid = _session_id()
+    with _lock:
+        tr = _active.pop(sid, None)
+        if tr:
+            _finish(tr)
+    _local.trace = None
+    if tr:
+        _export(tr)
+    return tr
+
+def _finish(tr):
+    tr.duration = time.perf_counter() - tr.started
+    _history[tr.session].append(tr)
+    _totals[("rerun", "total")][0] += 1
+    _totals[("rerun", "total")][1] += tr.duration
+    for kind, name, _, dur, _, _ in tr.spans:
+        _totals[(kind, name)][0] += 1
+        _totals[(kind, name)][1] += dur
+
+def history(session=None):
+    return list(_history.get(session or _session_id(), ()))
+
+@contextlib.contextmanager
+def _span(tr, kind, name):
+    t0, err = time.perf_counter(), None
+    try:
+        yield
+    except BaseException as e:
+        err = type(e).__name__
+        raise
+    finally:
+        tr.spans.append((kind, name, t0 - tr.started, time.perf_counter() - t0,
+                         threading.current_thread().name, err))
+
+def span(kind: str, name: str):
+    """Time a block: `with span("supabase", "listings.select"): ...`."""
+    if not enabled():
+        return _NULL
+    tr = current()
+    return _span(tr, kind, name) if tr else _NULL
+
+def bind(fn):
+    """Carry the caller's trace into a worker thread (thread pools don't inherit it)."""
+    if not enabled():
+        return fn
+    tr = current()
+
+    def run(*args, **kwargs):
+        _local.trace = tr
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.trace = None
+    return run
+
+# ---------------------------------------------------------------- Supabase proxy
+
+_PLAIN = (str, bytes, int, float, bool, list, dict, tuple, type(None))
+_TERMINAL = {"execute", "upload", "update", "remove", "download", "list"}
+_LABELS = {"table", "from_", "rpc"}
+_OPS = {"select", "insert", "update", "upsert", "delete"}
+
+class _Traced:
+    """Wraps a supabase client / query builder and times every terminal call."""
+    __slots__ = ("_obj", "_label")
+
+    def __init__(self, obj, label=""):
+        self._obj, self._label = obj, label
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if name == "storage":
+            return _Traced(attr, "storage")
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            label = self._label
+            storage = label.startswith("storage")
+            if name in _LABELS and args:
+                label = {"from_": "storage:", "rpc": "rpc:"}.get(name, "") + str(args[0])
+            elif name in _OPS and not storage and "." not in label:
+                label = f"{label}.{name}"     # e.g. "listings.select"
+            if name in _TERMINAL and (storage or name == "execute"):
+                with span("supabase", f"{label}.{name}" if storage else label):
+                    return attr(*args, **kwargs)
+            res = attr(*args, **kwargs)
+            return res if isinstance(res, _PLAIN) else _Traced(res, label)
+        return call
+
+def wrap_client(client):
+    return _Traced(client) if enabled() else client
+
+# ---------------------------------------------------------------- export
+
+def _export(tr):
+    try:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        log = os.path.join(EXPORT_DIR, "trace.jsonl")
+        with _lock:
+            if os.path.exists(log) and os.path.getsize(log) >= EXPORT_MAX_BYTES:
+                os.replace(log, log + ".1")
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(tr.to_dict()) + "\n")
+        path = os.path.join(EXPORT_DIR, f"trace-{os.getpid()}.prom")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(metrics_text())
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass
+
+def metrics_text() -> str:
+    """Prometheus text exposition of span counts and total seconds for this process."""
+    lines = ["# HELP rentacos_span_seconds Time spent in traced spans.",
+             "# TYPE rentacos_span_seconds summary"]
+    with _lock:
+        items = sorted(_totals.items())
+    for (kind, name), (count, secs) in items:
+        labels = f'kind="{kind}",name="{name.replace(chr(34), "")}"'
+        lines.append(f"rentacos_span_seconds_count{{{labels}}} {count}")
+        lines.append(f"rentacos_span_seconds_sum{{{labels}}} {secs:.6f}")
+    return "\n".join(lines) + "\n"
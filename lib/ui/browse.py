@@ -1,67 +1,133 @@
-import streamlit as st, datetime as dt
+import streamlit as st
 from lib.sb import sb_client
+from lib.data import fetch_listings_page, load_saved_searches, save_search, mark_seen, delete_saved_search, search_key
+from lib.alerts import MATCH_NOTE, alert_counts
+from lib.ui.grid import render_listing_grid
+from lib.suggest import MIN_PREFIX, SUGGEST_COUNT, suggest
 
-def render_browse_tab():
+GRID_WINDOW = 96   # most cards kept on the page; older pages scroll out of the window
+SUGGEST_ICONS = {"franchise": "🎬", "character": "🧑", "tag": "#", "title": "🔎"}
+
+def _feed(sb, city, ltypes, text):
+    """Cursor-fed window of loaded pages for the current filters, kept across reruns.
+
+    Each page is (start_cursor, rows, next_cursor). The first page is re-read on every rerun
+    through LISTING_CACHE (so at most once per cache TTL), which brings in new listings;
+    pages added by "Load more" / "Show newer" stay as loaded.
+    """
+    sig = (city, tuple(ltypes), text)
+    feed = st.session_state.get("browse_feed")
+    if not feed or feed["sig"] != sig:
+        rows, nxt = fetch_listings_page(sb, city, ltypes, text)
+        feed = {"sig": sig, "pages": [(None, rows, nxt)], "dropped": []}
+        st.session_state["browse_feed"] = feed
+    elif not feed["dropped"]:
+        rows, nxt = fetch_listings_page(sb, city, ltypes, text)
+        if len(feed["pages"]) > 1:
+            # Keep rows the new listings pushed off the first page, or they'd fall in the
+            # gap before the next (already loaded) page.
+            fresh = {it.id for it in rows}
+            rows = rows + [it for it in feed["pages"][0][1] if it.id not in fresh]
+            nxt = feed["pages"][0][2]
+        feed["pages"][0] = (None, rows, nxt)
+    return feed
+
+def _window_size(feed):
+    return sum(len(rows) for _, rows, _ in feed["pages"])
+
+def _load_older(sb, feed):
+    city, ltypes, text = feed["sig"]
+    start = feed["pages"][-1][2]
+    rows, nxt = fetch_listings_page(sb, city, list(ltypes), text, cursor=start)
+    feed["pages"].append((start, rows, nxt))
+    while _window_size(feed) > GRID_WINDOW and len(feed["pages"]) > 1:
+        feed["dropped"].append(feed["pages"].pop(0)[0])
+
+def _load_newer(sb, feed):
+    city, ltypes, text = feed["sig"]
+    start = feed["dropped"].pop()
+    rows, nxt = fetch_listings_page(sb, city, list(ltypes), text, cursor=start)
+    feed["pages"].insert(0, (start, rows, nxt))
+    while _window_size(feed) > GRID_WINDOW and len(feed["pages"]) > 1:
+        feed["pages"].pop()
+
+def _pick_suggestion(text):
+    st.session_state.browse_text = text
+
+def _suggestions(text):
+    """Completions for the search box from the in-process index; a click applies one as the filter."""
+    if len(search_key(text)) < MIN_PREFIX:
+        return
+    try:
+        hits = [s for s in suggest(text) if search_key(s.text) != search_key(text)]
+    except Exception:
+        return
+    for col, s in zip(st.columns(SUGGEST_COUNT), hits):
+        col.button(f"{SUGGEST_ICONS[s.kind]} {s.text}", key=f"suggest_{s.kind}_{s.text}", help=f"{s.count} listings",
+                   on_click=_pick_suggestion, args=(s.text,), use_container_width=True)
+
+def render_browse_tab(query=None):
+    """`query` is the banner search bar; a new value there replaces the Browse text filter."""
     sb = sb_client()
+    ss = st.session_state
+    if query and query != ss.get("browse_hero_q"):
+        ss.browse_text = query
+    ss.browse_hero_q = query
+    if "text_q_override" in ss:   # set by saved-search buttons
+        ss.browse_text = ss.pop("text_q_override")
     colf1, colf2, colf3 = st.columns([1,1,2])
     cities = ["All","Bengaluru","Mumbai","Delhi","Hyderabad","Pune","Kolkata","Chennai","Remote"]
     city_q = colf1.selectbox("City", cities, index=0)
     type_q = colf2.multiselect("Type", ["rent","sell","commission"], default=["rent","sell","commission"])
-    text_q = colf3.text_input("Search title / franchise / character")
+    text_q = colf3.text_input("Search title / franchise / character", key="browse_text")
+    _suggestions(text_q)
 
     if st.session_state.user:
         uid = st.session_state.user.id
-        saved_rows = sb.table("saved_searches").select("*").eq("user_id", uid).order("created_at", desc=True).execute().data
+        saved_rows = load_saved_searches(sb, uid)
         if saved_rows:
+            counts, partial = alert_counts(sb, saved_rows)
             with st.expander("🔔 Saved search alerts"):
+                st.caption(MATCH_NOTE)
                 for s in saved_rows:
-                    q = sb.table("listings").select("id,title,franchise,character,city,ltype,created_at") \
-                        .eq("status","active").gte("created_at", s.get("last_seen"))
-                    new_rows = q.order("created_at", desc=True).execute().data
-                    qtext = s.get("query") or ""
-                    count = 0
-                    for r in new_rows:
-                        hay = " ".join([r.get("title") or "", r.get("franchise") or "", r.get("character") or ""]).lower()
-                        if not qtext or qtext.lower() in hay:
-                            count += 1
+                    count = counts.get(s.id, 0)
+                    count = f"{count}+" if s.id in partial else count
                     cols_alert = st.columns([3,1,1])
                     with cols_alert[0]:
-                        st.write(f"**{qtext or 'Any'}** — new since last check")
+                        st.write(f"**{s.query or 'Any'}** — new since last check")
                     with cols_alert[1]:
-                        if st.button(f"View {count} new", key=f"view_{s['id']}"):
-                            sb.table("saved_searches").update({"last_seen": dt.datetime.utcnow().isoformat()}).eq("id", s['id']).execute()
-                            if qtext:
-                                st.session_state["text_q_override"] = qtext
+                        if st.button(f"View {count} new", key=f"alert_view_{s.id}"):
+                            mark_seen(sb, s.id)
+                            if s.query:
+                                st.session_state["text_q_override"] = s.query
                             st.rerun()
                     with cols_alert[2]:
-                        if st.button("Delete", key=f"del_{s['id']}"):
-                            sb.table("saved_searches").delete().eq("id", s['id']).execute()
+                        if st.button("Delete", key=f"alert_del_{s.id}"):
+                            delete_saved_search(sb, s.id)
                             st.rerun()
 
-    _text_q = st.session_state.pop("text_q_override", None) or text_q
-    q = sb.table("listings").select("*").eq("status","active")
-    if city_q != "All": q = q.eq("city", city_q)
-    if type_q: q = q.in_("ltype", type_q)
-    rows = q.order("created_at", desc=True).execute().data
-
-    if _text_q:
-        t = _text_q.lower()
-        rows = [r for r in rows if t in (" ".join([(r.get("title") or ""),(r.get("franchise") or ""),(r.get("character") or "")] )).lower()]
-
+    city = None if city_q == "All" else city_q
+    feed = _feed(sb, city, type_q, text_q)
     if st.session_state.user and st.button("⭐ Save this search"):
-        sb.table("saved_searches").insert({
-            "user_id": st.session_state.user.id,
-            "city": None if city_q=="All" else city_q,
-            "ltypes": type_q or ["rent","sell","commission"],
-            "query": _text_q or ""
-        }).execute()
+        save_search(sb, st.session_state.user.id, city, type_q, text_q)
         st.toast("Saved! You'll see alerts here when new listings match.")
 
-    cols = st.columns(3)
-    for i, it in enumerate(rows[:60]):
-        with cols[i%3]:
-            st.subheader(it.get("title","Untitled"))
-            if it.get("images"): st.image(it["images"][0], use_container_width=True)
-            price_text = f"₹{int(it.get('price') or 0)}" + ("/day" if it.get("price_unit")=="day" else "")
-            st.caption(f"{it.get('ltype','').title()} • {price_text} • {it.get('city') or '-'}")
-            st.write(f"**Franchise:** {it.get('franchise') or '-'}  |  **Character:** {it.get('character') or '-'}")
+    if feed["dropped"]:
+        if st.button("↑ Show newer", use_container_width=True):
+            _load_newer(sb, feed)
+            st.rerun()
+
+    rows = [it for _, page, _ in feed["pages"] for it in page]
+    if not rows:
+        st.info("No listings match these filters yet.")
+    render_listing_grid(rows, key="browse")
+
+    nav = st.columns([1,1])
+    with nav[0]:
+        if st.button("↻ Refresh", use_container_width=True):
+            st.session_state.pop("browse_feed", None)   # shared cache still applies (short TTL)
+            st.rerun()
+    with nav[1]:
+        if feed["pages"][-1][2] and st.button("Load more", use_container_width=True, type="primary"):
+            _load_older(sb, feed)
+            st.rerun()
@@ -0,0 +1,50 @@
+import streamlit as st
+
+from lib.sb import sb_client
+from lib.bulk import REQUIRED, OPTIONAL, TEMPLATE, ImageArchive, import_listings, read_csv, validate
+from lib.enrich import worker_mode
+
+@st.fragment
+def render_bulk_import(uid):
+    """CSV + ZIP import for sellers with many props; a fragment, so the preview doesn't rerun the form."""
+    with st.expander("📦 Bulk import (CSV + ZIP of photos)"):
+        st.caption(f"Required columns: {', '.join(REQUIRED)}. Optional: {', '.join(OPTIONAL)}. "
+                   "Separate tags and image file names with `;`. Re-importing the same file skips rows already listed.")
+        st.download_button("Download CSV template", TEMPLATE, file_name="listings_template.csv", mime="text/csv")
+        csv_file = st.file_uploader("Listings CSV", type=["csv"], key="bulk_csv")
+        zip_file = st.file_uploader("Photos ZIP (optional)", type=["zip"], key="bulk_zip")
+        if not csv_file:
+            return
+        try:
+            df = read_csv(csv_file)
+            images = ImageArchive(zip_file) if zip_file else None
+            rows, errors = validate(df, set(images.names) if images else None)
+        except Exception as e:
+            st.error(f"Could not read the files: {e}")
+            return
+
+        st.write(f"**{len(rows)}** of {len(df)} rows ready to import.")
+        if len(errors):
+            st.dataframe(errors, hide_index=True, use_container_width=True)
+        if not st.button(f"Import {len(rows)} listings", disabled=not len(rows), type="primary"):
+            return
+        bar = st.progress(0.0, text="Importing…")
+        try:
+            report = import_listings(sb_client(), uid, df, images, enrich=worker_mode() != "off",
+                                     on_progress=lambda done, total: bar.progress(done / total, text=f"{done}/{total}"))
+        except Exception as e:
+            st.error(f"Import failed: {e}. Run it again to pick up where it stopped.")
+            return
+        bar.empty()
+        msg = f"Imported {report.inserted} listings"
+        if report.skipped:
+            msg += f", skipped {report.skipped} already imported"
+        if report.queued:
+            msg += f"; {report.queued} are being tagged and will appear in Browse shortly"
+        st.success(msg + ".")
+        if report.errors:
+            errs = report.error_frame()
+            st.warning(f"{len(errs)} problems — fix these rows and import the same file again.")
+            st.dataframe(errs, hide_index=True, use_container_width=True)
+            st.download_button("Download errors", errs.to_csv(index=False), file_name="import_errors.csv",
+                               mime="text/csv")
@@ -0,0 +1,56 @@
+import streamlit as st
+from lib import trace
+from lib.sb import connection_stats
+from lib.cache import get_cache
+from lib.qcache import LISTING_CACHE
+from lib.jobs import get_queue
+
+KIND_COLORS = {"supabase": "#b39cff", "hf": "#ff6fb7", "image": "#ffd36e"}
+
+def debug_enabled() -> bool:
+    return st.query_params.get("debug") == "1" or bool(st.secrets.get("DEBUG", False))
+
+def _waterfall(tr) -> str:
+    total = max(tr.duration or 0, 1e-6)
+    rows = []
+    for kind, name, start, dur, thread, err in sorted(tr.spans, key=lambda s: s[2]):
+        left, width = 100 * start / total, max(100 * dur / total, 0.5)
+        color = "#ff4b4b" if err else KIND_COLORS.get(kind, "#b9fff1")
+        rows.append(
+            f"<div style='display:flex;gap:8px;font-size:11px;align-items:center;'>"
+            f"<div style='width:42%;overflow:hidden;white-space:nowrap;text-overflow:ellipsis;' title='{thread}'>"
+            f"{kind} · {name}</div>"
+            f"<div style='flex:1;position:relative;height:10px;background:#f1f5ff;border-radius:4px;'>"
+            f"<div style='position:absolute;left:{left:.1f}%;width:{width:.1f}%;height:10px;"
+            f"background:{color};border-radius:4px;'></div></div>"
+            f"<div style='width:56px;text-align:right;'>{dur * 1000:.0f} ms</div></div>"
+        )
+    return "".join(rows)
+
+def render_debug_panel(last=None):
+    """Sidebar panel: connection/cache counters and a waterfall of the last traced rerun."""
+    if not debug_enabled():
+        return
+    with st.sidebar.expander("🐢 Debug", expanded=False):
+        stats = connection_stats()
+        st.caption(f"Supabase clients: {stats['opened']} opened / {stats['reused']} reused")
+        ai = get_cache().stats()
+        st.caption(f"AI cache: {ai['hits']} hits / {ai['misses']} misses, {ai['entries']} entries")
+        q = LISTING_CACHE.stats()
+        st.caption(f"Browse cache: {q['hit_rate']:.0%} hit rate ({q['hits']} hits, {q['coalesced']} coalesced, "
+                   f"{q['misses']} misses), {q['entries']} entries, served {q['mean_served_age_s']}s old on average")
+        jobs = get_queue().stats()
+        st.caption(f"Jobs: {jobs['queued']} queued / {jobs['running']} running / {jobs['failed']} failed")
+        if not trace.enabled():
+            st.caption("Tracing is off. Set RENTACOS_TRACE=1 or TRACE = true in secrets.")
+            return
+        runs = trace.history()
+        if not runs:
+            return
+        tr = last or runs[-1]
+        spent = sum(d for _, _, _, d, t, _ in tr.spans if t == tr.thread)
+        st.caption(f"Rerun #{tr.rerun}: {tr.duration * 1000:.0f} ms total, "
+                   f"{spent * 1000:.0f} ms in backend/AI/image calls, {len(tr.spans)} spans")
+        st.markdown(_waterfall(tr), unsafe_allow_html=True)
+        st.caption("Recent reruns (ms): " + ", ".join(f"{r.duration * 1000:.0f}" for r in runs[-10:]))
+        st.download_button("Metrics (Prometheus text)", trace.metrics_text(), "rentacos.prom", "text/plain")
@@ -0,0 +1,77 @@
+from html import escape
+import streamlit as st
+
+from lib.auth import sign_in_with_google_button
+from lib.data import get_listing, get_listings, similar_images, start_chat
+from lib.similar import similar_listings
+from lib.ui.grid import render_listing_grid
+from lib.ui.inbox import open_chat
+
+SIMILAR_COUNT = 8
+
+def _image_urls(it):
+    urls = [r.get("card", {}).get("webp") or r.get("full", {}).get("jpg") for r in it.image_renditions]
+    return [u for u in urls if u] or list(it.images)
+
+def _reused_photo(sb, it) -> bool:
+    """True if this listing's cover photo also appears in another seller's active listing."""
+    h = it.image_renditions[0].get("dhash") if it.image_renditions else None
+    if h is None:
+        return False
+    try:
+        matches = similar_images(sb, h, max_distance=4)
+    except Exception:
+        return False
+    return any(m.get("listing") and m.get("owner") != it.owner for m in matches)
+
+def _message_seller(sb, it):
+    user = st.session_state.get("user")
+    if not user:
+        st.caption("Sign in to message the seller.")
+        sign_in_with_google_button(key="signin_google_detail")
+        return
+    if user.id == it.owner:
+        return
+    if st.button("💬 Message seller", use_container_width=True):
+        try:
+            open_chat(start_chat(sb, it.id, user.id, it.owner))
+        except Exception as e:
+            st.error(f"Could not start a chat: {e}")
+            return
+        st.success("Chat opened — continue in the 💬 Messages tab.")
+
+def render_listing_detail(sb, listing_id):
+    """One listing (app.py routes here on ?listing=<id>) with a "Similar props" strip underneath."""
+    if st.button("← Back to Browse"):
+        del st.query_params["listing"]
+        st.rerun()
+    it = get_listing(sb, listing_id)
+    if not it or it.status != "active":
+        st.info("This listing is no longer available.")
+        return
+
+    left, right = st.columns([3, 2])
+    with left:
+        urls = _image_urls(it)
+        if urls:
+            st.image(urls[0], use_container_width=True)
+            if len(urls) > 1:
+                st.image(urls[1:], width=120)
+    with right:
+        st.subheader(it.title)
+        badge = "rent" if it.ltype == "rent" else "sell"
+        st.markdown(f"<span class='price'>{it.price_label}</span> "
+                    f"<span class='badge {badge}'>{escape(it.ltype.upper())}</span>", unsafe_allow_html=True)
+        st.caption(f"📍 {it.city or '-'} · {it.franchise or '-'} · {it.character or '-'}")
+        if it.tags:
+            st.markdown(" ".join(f"<span class='tag'>#{escape(t)}</span>" for t in it.tags), unsafe_allow_html=True)
+        st.write(it.description or "")
+        _message_seller(sb, it)
+        if _reused_photo(sb, it):
+            st.warning("This photo also appears in another seller's listing — ask for extra pictures before paying.")
+
+    ids = [i for i, _ in similar_listings(it, SIMILAR_COUNT)]
+    rows = get_listings(sb, ids)
+    if rows:
+        st.markdown("#### Similar props")
+        render_listing_grid(rows, key="similar")
@@ -0,0 +1,51 @@
+from html import escape
+import streamlit as st
+
+THUMB_SIDE = 320   # matches lib.images.RENDITIONS["thumb"]
+GRID_COLS = 4
+
+def open_listing(listing_id):
+    """Button callback: show a listing's detail view in this session (app.py routes on ?listing=)."""
+    st.query_params["listing"] = str(listing_id)
+
+def _thumb_html(url) -> str:
+    if not url:
+        return "<div class='lcard-img lcard-empty'>No photo</div>"
+    url = escape(url, quote=True)
+    img = (f"<img src='{{src}}' loading='lazy' decoding='async' width='{THUMB_SIDE}' height='{THUMB_SIDE}' alt=''>")
+    if url.endswith(".webp"):
+        # renditions are stored side by side as thumb.webp / thumb.jpg
+        return (f"<picture class='lcard-img'><source type='image/webp' srcset='{url}'>"
+                + img.format(src=url[:-5] + ".jpg") + "</picture>")
+    return f"<picture class='lcard-img'>{img.format(src=url)}</picture>"
+
+def card_html(it) -> str:
+    badge = "rent" if it.ltype == "rent" else "sell"
+    head = escape(it.title or "Untitled")
+    return (
+        "<div class='lcard'>"
+        f"{_thumb_html(it.thumb_url)}"
+        f"<div class='lcard-body'><h4>{head}</h4>"
+        f"<div class='lcard-meta'><span class='price'>{it.price_label}</span>"
+        f"<span class='badge {badge}'>{escape(it.ltype.upper())}</span></div>"
+        f"<div class='lcard-sub'>{escape(it.city or '-')}</div>"
+        f"<div class='lcard-sub'>{escape(it.franchise or '-')} · {escape(it.character or '-')}</div>"
+        "</div></div>"
+    )
+
+def render_listing_grid(rows, key="grid", on_open=open_listing):
+    """Render Listing cards, each with a "View" button that calls `on_open(listing_id)`.
+
+    A plain link would reload the page and start a new session (signing the user out), so
+    cards that open are laid out in columns with a button each. With on_open=None the grid
+    is a single HTML block: one delta message however many cards.
+    """
+    if on_open is None:
+        cards = "".join(card_html(it) for it in rows)
+        st.markdown(f"<div class='lgrid'>{cards}</div>", unsafe_allow_html=True)
+        return
+    for start in range(0, len(rows), GRID_COLS):
+        for col, it in zip(st.columns(GRID_COLS), rows[start:start + GRID_COLS]):
+            with col:
+                st.markdown(card_html(it), unsafe_allow_html=True)
+                st.button("View", key=f"{key}_{it.id}", on_click=on_open, args=(it.id,), use_container_width=True)
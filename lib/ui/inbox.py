@@ -0,0 +1,166 @@
+# lib/ui/inbox.py
+# Messages tab. The inbox and the open thread live in session_state with their keyset
+# cursors; each poll asks only for rows past the cursor, so a refresh costs the same for
+# a two-message thread and a two-thousand-message one. Polls back off while idle.
+import dataclasses, time
+import streamlit as st
+
+from lib.sb import sb_client
+from lib.data import (THREAD_PAGE, chats_updated_since, get_listings, inbox_page, latest_messages,
+                      mark_read, new_messages, older_messages, send_message, unread_count)
+
+POLL_TICK = 3          # fragment rerun interval; a tick with no poll due makes no request
+POLL_MIN, POLL_MAX = 3, 60
+UNREAD_TTL = 30        # seconds the unread total is reused across reruns
+
+def _backoff(state, got_new):
+    """Reset the poll interval on activity, double it (up to POLL_MAX) on every idle poll."""
+    state["idle"] = 0 if got_new else state["idle"] + 1
+    state["next_poll"] = time.time() + min(POLL_MAX, POLL_MIN * 2 ** state["idle"])
+
+def _due(state):
+    return time.time() >= state["next_poll"]
+
+def _inbox():
+    return st.session_state.setdefault("inbox", {"chats": {}, "since": None, "next": None, "loaded": False,
+                                                 "idle": 0, "next_poll": 0.0})
+
+def _merge(inbox, chats):
+    for c in chats:
+        inbox["chats"][c.id] = c
+        if inbox["since"] is None or c.cursor > inbox["since"]:
+            inbox["since"] = c.cursor
+
+def open_chat(chat):
+    """Make `chat` the open thread (e.g. from a listing's "Message seller" button)."""
+    _merge(_inbox(), [chat])
+    st.session_state.chat_open = chat.id
+
+def _set_read(sb, inbox, chat, uid, incoming=False):
+    if not (incoming or chat.unread_for(uid)):
+        return
+    mark_read(sb, chat.id)
+    side = "buyer_unread" if uid == chat.buyer else "seller_unread"
+    inbox["chats"][chat.id] = dataclasses.replace(chat, **{side: 0})
+    st.session_state.pop("unread_total", None)
+
+def unread_badge(sb) -> int:
+    """Unread messages across all the user's chats, from the per-chat counters."""
+    ss = st.session_state
+    hit = ss.get("unread_total")
+    if hit is None or time.time() - hit[1] > UNREAD_TTL:
+        try:
+            hit = ss.unread_total = (unread_count(sb), time.time())
+        except Exception:
+            return 0
+    return hit[0]
+
+def _titles(sb, chats) -> dict:
+    titles = st.session_state.setdefault("chat_titles", {})
+    missing = list({c.listing for c in chats if c.listing not in titles})
+    if missing:
+        found = {r.id: r.title for r in get_listings(sb, missing)}
+        for lid in missing:
+            titles[lid] = found.get(lid, "Listing no longer available")
+    return titles
+
+@st.fragment(run_every=POLL_TICK)
+def _inbox_fragment(uid):
+    sb, inbox = sb_client(), _inbox()
+    try:
+        if not inbox["loaded"]:
+            chats, inbox["next"] = inbox_page(sb, uid)
+            _merge(inbox, chats)
+            inbox["loaded"] = True
+            _backoff(inbox, True)
+        elif _due(inbox):
+            fresh = chats_updated_since(sb, uid, inbox["since"]) if inbox["since"] else inbox_page(sb, uid)[0]
+            _merge(inbox, fresh)
+            _backoff(inbox, bool(fresh))
+            if fresh:
+                st.session_state.pop("unread_total", None)
+    except Exception as e:
+        st.error(f"Could not load conversations: {e}")
+        return
+
+    chats = sorted(inbox["chats"].values(), key=lambda c: c.cursor, reverse=True)
+    if not chats:
+        st.info("No conversations yet. Open a listing and message the seller to start one.")
+        return
+    titles = _titles(sb, chats)
+    for c in chats:
+        unread = c.unread_for(uid)
+        label = f"{'🛒' if uid == c.buyer else '🏷️'} {titles.get(c.listing, 'Listing')}" + (f"  ({unread})" if unread else "")
+        if st.button(label, key=f"chat_{c.id}", help=c.last_text or None, use_container_width=True,
+                     type="primary" if c.id == st.session_state.get("chat_open") else "secondary"):
+            st.session_state.chat_open = c.id
+            st.rerun()
+    if inbox["next"] and st.button("Load older conversations", key="inbox_older"):
+        chats, inbox["next"] = inbox_page(sb, uid, before=inbox["next"])
+        _merge(inbox, chats)
+        st.rerun(scope="fragment")
+
+def _load_thread(sb, chat_id):
+    msgs = latest_messages(sb, chat_id)
+    return {"msgs": msgs, "cursor": msgs[-1].cursor if msgs else None,
+            "older": msgs[0].cursor if len(msgs) == THREAD_PAGE else None, "idle": 0, "next_poll": 0.0}
+
+@st.fragment(run_every=POLL_TICK)
+def _thread_fragment(uid):
+    ss, sb, inbox = st.session_state, sb_client(), _inbox()
+    chat = inbox["chats"].get(ss.get("chat_open"))
+    if chat is None:
+        st.caption("Pick a conversation.")
+        return
+    threads = ss.setdefault("threads", {})
+    try:
+        state, incoming = threads.get(chat.id), False
+        if state is None:
+            state = threads[chat.id] = _load_thread(sb, chat.id)
+            _backoff(state, True)
+        elif _due(state):
+            fresh = new_messages(sb, chat.id, state["cursor"]) if state["cursor"] else latest_messages(sb, chat.id)
+            state["msgs"].extend(fresh)
+            if fresh:
+                state["cursor"] = fresh[-1].cursor
+            _backoff(state, bool(fresh))
+            incoming = any(m.sender != uid for m in fresh)
+        _set_read(sb, inbox, chat, uid, incoming)
+    except Exception as e:
+        st.error(f"Could not load messages: {e}")
+        return
+
+    if state["older"] and st.button("Show earlier messages", key=f"older_{chat.id}"):
+        older = older_messages(sb, chat.id, state["older"])
+        state["msgs"][:0] = older
+        state["older"] = older[0].cursor if len(older) == THREAD_PAGE else None
+    for m in state["msgs"]:
+        with st.chat_message("user" if m.sender == uid else "assistant", avatar="🙂" if m.sender == uid else "🧵"):
+            st.write(m.text)
+
+    with st.form(f"send_{chat.id}", clear_on_submit=True, border=False):
+        text = st.text_input("Message", placeholder="Write a message…", label_visibility="collapsed")
+        if st.form_submit_button("Send") and text.strip():
+            try:
+                send_message(sb, chat.id, uid, text.strip())
+            except Exception as e:
+                st.error(f"Could not send: {e}")
+                return
+            # Poll right away rather than appending locally, so the cursor only ever moves
+            # past rows the server has returned.
+            state["idle"], state["next_poll"] = 0, 0.0
+            st.rerun(scope="fragment")
+
+def render_inbox_tab():
+    try:
+        uid = st.session_state.user.id
+    except Exception:
+        st.info("Sign in to message sellers.")
+        return
+    n = unread_badge(sb_client())
+    st.subheader("Messages" + (f" · {n} unread" if n else ""))
+    left, right = st.columns([2, 3])
+    with left:
+        _inbox_fragment(uid)
+    with right:
+        _thread_fragment(uid)
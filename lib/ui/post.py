@@ -1,133 +1,234 @@
+import hashlib, uuid
 import streamlit as st
-from PIL import Image
-import datetime as dt
 
 from lib.sb import sb_client
-from lib.images import upload_images_to_storage
 from lib.constants import FRANCHISE_CANDIDATES, POPULAR_CHARACTERS
 from lib.ai import (
     write_with_ai,
     auto_tags,
     hf_caption,
     guess_franchise_from_text,
+    hf_ner_people,
     suggest_characters,  # expects to use POPULAR_CHARACTERS + optional NER
+    ai_backend,
 )
-
-def render_post_tab():
-    sb = sb_client()
-
-    # Basic form
-    title = st.text_input("Title *")
-    ltype = st.selectbox("Type *", ["rent", "sell", "commission"])
-    price = st.number_input("Price (₹) *", min_value=0, step=50)
+from lib.hf import fan_out
+from lib.data import get_listings, insert_listing, update_listing
+from lib.similar import get_index, near_duplicates
+from lib.enrich import enrichment_payload, enqueue_enrichment, enrich_now, worker_mode
+from lib.ui.bulk import render_bulk_import
+
+# The form is split into fragments: editing a field reruns only its fragment, and the
+# hosted models run only from the explicit "Analyze" step, keyed on the inputs they read.
+# Buttons that need the whole page (AI helpers, Publish) read values from session_state.
+OTHER_CHARACTER = "Other (type below)"
+
+def _sync_price_unit():
     # default price_unit: "day" for rent, "fixed" otherwise
-    price_unit_default_index = 1 if ltype == "rent" else 0
-    price_unit = st.selectbox("Price unit *", ["fixed", "day"], index=price_unit_default_index)
-    city = st.text_input("City *")
-    desc = st.text_area("Description *")
-    uploads = st.file_uploader("Images (up to 5)", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
-
-    # --- Auto context from image caption + text guesses ---
-    auto_context = desc or ""
-    caption = ""
-    if uploads:
-        try:
-            caption = hf_caption(uploads[0].getvalue())
-        except Exception:
-            caption = ""
-        if caption:
-            auto_context += "\n" + caption
-            st.caption(f"AI image hint: {caption}")
-
-    guessed = guess_franchise_from_text(auto_context) if auto_context else []
+    st.session_state.post_price_unit = "day" if st.session_state.post_ltype == "rent" else "fixed"
+
+def _image_digest(upload) -> str:
+    """sha256 of an uploaded file, computed once per file for the whole session."""
+    digests = st.session_state.setdefault("post_img_digests", {})
+    fid = getattr(upload, "file_id", None) or f"{upload.name}:{upload.size}"
+    if fid not in digests:
+        digests[fid] = hashlib.sha256(upload.getvalue()).hexdigest()
+    return digests[fid]
+
+def _analysis_sig(uploads):
+    return (_image_digest(uploads[0]) if uploads else None,
+            st.session_state.get("post_title", ""), st.session_state.get("post_desc", ""))
+
+def _analyze(uploads):
+    """Remote pass: caption the first image, then franchise ranking and NER side by side."""
+    title, desc = st.session_state.get("post_title", ""), st.session_state.get("post_desc", "")
+    caption = hf_caption(uploads[0].getvalue(), _image_digest(uploads[0])) if uploads else ""
+    context = "\n".join(x for x in (title, desc, caption) if x)
+    franchises = []
+    if context:
+        franchises = fan_out({
+            "franchise": lambda: guess_franchise_from_text(context, refine=True),
+            "people": lambda: hf_ner_people(context),   # warms the cache suggest_characters() reads
+        })["franchise"]
+    st.session_state.post_analysis = {"sig": _analysis_sig(uploads), "caption": caption,
+                                      "context": context, "franchises": franchises}
+
+@st.fragment
+def _basics_fragment():
+    st.selectbox("Type *", ["rent", "sell", "commission"], key="post_ltype", on_change=_sync_price_unit)
+    st.number_input("Price (₹) *", min_value=0, step=50, key="post_price")
+    st.session_state.setdefault("post_price_unit", "day" if st.session_state.post_ltype == "rent" else "fixed")
+    st.selectbox("Price unit *", ["fixed", "day"], key="post_price_unit")
+    st.text_input("City *", key="post_city")
+
+@st.fragment
+def _item_fragment():
+    # Title and description live here with the suggestions they feed, so editing either
+    # refreshes the franchise/character choices without rerunning the whole page.
+    if "post_desc_pending" in st.session_state:
+        st.session_state.post_desc = st.session_state.pop("post_desc_pending")
+    st.text_input("Title *", key="post_title")
+    st.text_area("Description *", key="post_desc")
+    uploads = st.file_uploader("Images (up to 5)", type=["png", "jpg", "jpeg"],
+                               accept_multiple_files=True, key="post_uploads")
+
+    # Local suggestions are instant; the hosted models only run when asked to refine.
+    backend = ai_backend()
+    refine = st.toggle("✨ Refine suggestions with AI (slower)", value=backend == "remote",
+                       disabled=backend == "local", key="post_refine")
+    analysis = st.session_state.get("post_analysis")
+    if refine:
+        stale = analysis is not None and analysis["sig"] != _analysis_sig(uploads)
+        label = "🔍 Re-analyze" if stale else "🔍 Analyze"
+        if st.button(label, disabled=analysis is not None and not stale):
+            with st.spinner("Analyzing…"):
+                _analyze(uploads)
+            analysis = st.session_state.post_analysis
+        if analysis and analysis["caption"]:
+            st.caption(f"AI image hint: {analysis['caption']}")
+
+    # --- Franchise / character: local lexicon, or the last analysis when there is one ---
+    title, desc = st.session_state.get("post_title", ""), st.session_state.get("post_desc", "")
+    use_analysis = bool(refine and analysis)
+    if use_analysis:
+        context, guessed = analysis["context"], analysis["franchises"]
+    else:
+        context = "\n".join(x for x in (title, desc) if x)
+        guessed = guess_franchise_from_text(context) if context else []
     options = guessed + [x for x in FRANCHISE_CANDIDATES if x not in guessed]
-    # safe default if nothing guessed
-    default_idx = 0 if options else 0
-    if not options:
-        options = FRANCHISE_CANDIDATES
-    try:
-        default_idx = 0 if guessed else options.index("Naruto")
-    except Exception:
-        default_idx = 0
-
-    franchise = st.selectbox("Franchise (auto)", options, index=default_idx)
+    default_idx = 0 if guessed else options.index("Naruto")
+    if st.session_state.get("post_franchise") not in options:
+        st.session_state.pop("post_franchise", None)
+    franchise = st.selectbox("Franchise (auto)", options, index=default_idx, key="post_franchise")
 
     # Character auto-suggest
-    char_sugs = suggest_characters(franchise, auto_context) if franchise else []
+    char_sugs = suggest_characters(franchise, context, use_analysis) if franchise else []
     fallback_chars = POPULAR_CHARACTERS.get(franchise, ["Naruto Uzumaki", "Sasuke Uchiha"])
-    char_options = (char_sugs or fallback_chars) + ["Other (type below)"]
-    character_sel = st.selectbox("Character (suggested)", char_options)
-    character = st.text_input("Or type character") if character_sel == "Other (type below)" else character_sel
+    char_options = (char_sugs or fallback_chars) + [OTHER_CHARACTER]
+    if st.session_state.get("post_character_sel") not in char_options:
+        st.session_state.pop("post_character_sel", None)
+    if st.selectbox("Character (suggested)", char_options, key="post_character_sel") == OTHER_CHARACTER:
+        st.text_input("Or type character", key="post_character_other")
+
+@st.fragment
+def _terms_fragment():
+    st.markdown("### Terms & Safety")
+    st.write("This platform **does not** handle delivery, payments, or escrow. Arrange directly and keep proofs.")
+    st.checkbox("I understand and agree to the terms *", key="post_agree")
+
+def _character():
+    sel = st.session_state.get("post_character_sel")
+    return st.session_state.get("post_character_other", "") if sel == OTHER_CHARACTER else sel
+
+def render_post_tab():
+    if st.session_state.get("user"):
+        render_bulk_import(st.session_state.user.id)
+    _item_fragment()
+    _basics_fragment()
+
+    ss = st.session_state
+    caption = (ss.get("post_analysis") or {}).get("caption", "")
 
     # --- AI helpers ---
     c1, c2 = st.columns(2)
     with c1:
         if st.button("✍️ Write with AI", use_container_width=True):
-            out = write_with_ai(title, franchise, character, ltype, True)
-            st.session_state.ai_desc = out
+            ss.post_desc_pending = write_with_ai(ss.post_title, ss.post_franchise, _character(), ss.post_ltype, True)
+            st.rerun()
     with c2:
         if st.button("🏷️ Auto-tag", use_container_width=True):
-            base = f"{title} {franchise} {character} {desc} {caption}"
-            st.session_state.tags = auto_tags(base)
-            st.toast(", ".join(st.session_state.tags) if st.session_state.get("tags") else "No tags")
+            base = f"{ss.post_title} {ss.post_franchise} {_character()} {ss.post_desc} {caption}"
+            ss.tags = auto_tags(base, ss.get("post_refine", False))
+            st.toast(", ".join(ss.tags) if ss.get("tags") else "No tags")
+    if ss.get("tags"):
+        st.caption("Tags: " + ", ".join(ss.tags))
 
-    if st.session_state.get("ai_desc"):
-        desc = st.text_area("AI Description", st.session_state.ai_desc, height=140)
-
-    # Terms
-    st.markdown("### Terms & Safety")
-    st.write("This platform **does not** handle delivery, payments, or escrow. Arrange directly and keep proofs.")
-    agree = st.checkbox("I understand and agree to the terms *")
+    _terms_fragment()
 
     # --- Publish ---
+    if ss.get("post_dupes"):
+        titles = [r.title for r in get_listings(sb_client(), ss.post_dupes)]
+        st.warning("This looks like a prop you've already listed" + (": " + ", ".join(f"“{t}”" for t in titles) if titles else "."))
+        st.checkbox("It's a different item — publish anyway", key="post_dupe_ok")
     if st.button("Publish", use_container_width=True):
+        title, ltype, price, city = ss.post_title, ss.post_ltype, ss.post_price, ss.post_city
+        desc, uploads = ss.post_desc, ss.get("post_uploads") or []
         missing = []
         if not title: missing.append("Title")
         if not ltype: missing.append("Type")
         if price is None: missing.append("Price")
         if not city: missing.append("City")
         if not desc: missing.append("Description")
-        if not agree: missing.append("Agreement")
+        if not ss.get("post_agree"): missing.append("Agreement")
 
         if missing:
             st.error("Fill all required fields and agree to terms. Missing: " + ", ".join(missing))
             return
 
         try:
-            uid = st.session_state.user.id
+            uid = ss.user.id
         except Exception:
             st.error("You must be signed in to publish.")
             return
 
-        # Upload images to Supabase Storage (public)
-        image_urls = []
-        try:
-            image_urls = upload_images_to_storage(uploads, uid) if uploads else []
-        except Exception as e:
-            st.error(f"Image upload failed: {e}")
-            return
-
+        ss.pop("post_dupes", None)
+        if not ss.get("post_dupe_ok"):
+            try:
+                dupes = near_duplicates(uid, title, ss.post_franchise, _character(), ss.get("tags", []))
+            except Exception:
+                dupes = []
+            if dupes:
+                ss.post_dupes = [i for i, _ in dupes]
+                st.rerun()
+
+        # Insert right away as "enriching"; renditions, caption and tags are filled in by the
+        # job worker, which flips the listing to "active" when it's done.
+        listing_id = str(uuid.uuid4())
         data = {
+            "id": listing_id,
             "owner": uid,
             "ltype": ltype,
             "title": title,
             "price": int(price),
-            "price_unit": price_unit,
+            "price_unit": ss.post_price_unit,
             "city": city,
             "description": desc,
-            "franchise": franchise,
-            "character": character,
-            "tags": st.session_state.get("tags", []),
-            "images": image_urls,
+            "franchise": ss.post_franchise,
+            "character": _character(),
+            "tags": ss.get("tags", []),
             "quantity": 1,
-            "status": "active",
+            "status": "enriching",
         }
-
+        sb = sb_client()
         try:
-            sb.table("listings").insert(data).execute()
-            st.success("Listing published!")
-            st.session_state.pop("ai_desc", None)
-            st.session_state.pop("tags", None)
-            st.rerun()
+            insert_listing(sb, data)
         except Exception as e:
             st.error(f"Failed to publish listing: {e}")
+            return
+        try:
+            get_index().add(listing_id, uid, title, data["franchise"], data["character"], data["tags"])
+        except Exception:
+            pass
+
+        fields = {k: data[k] for k in ("title", "description", "franchise", "character", "tags")}
+        if caption:
+            fields["caption"] = caption
+        try:
+            payload = enrichment_payload(listing_id, uid, uploads, fields)
+            if worker_mode() == "off":
+                with st.spinner("Processing photos…"):
+                    enrich_now(sb, payload)
+                st.success("Listing published!")
+            else:
+                enqueue_enrichment(payload)
+                st.success("Listing published! Photos and tags are being processed and it will appear in Browse shortly.")
+        except Exception as e:
+            try:
+                update_listing(sb, listing_id, {"status": "active"})
+            except Exception as e2:
+                st.error(f"Processing the photos failed ({e}) and the listing could not be made visible "
+                         f"either: {e2}")
+            else:
+                st.warning(f"Listing published, but processing the photos failed: {e}")
+        for k in ("tags", "post_analysis", "post_img_digests", "post_dupe_ok"):
+            ss.pop(k, None)
@@ -1,5 +1,6 @@
 import streamlit as st
 from lib.sb import sb_client
+from lib.data import load_saved_searches, save_search, delete_saved_search
 
 def render_saved_tab():
     sb = sb_client()
@@ -18,12 +19,7 @@ def render_saved_tab():
 
     if st.button("Save this search"):
         try:
-            sb.table("saved_searches").insert({
-                "user_id": uid,
-                "city": None if not q_city else q_city,
-                "ltypes": q_types or ["rent", "sell", "commission"],
-                "query": q_text or "",
-            }).execute()
+            save_search(sb, uid, q_city, q_types, q_text)
             st.success("Saved! You'll see alerts on Browse when new listings match.")
             st.rerun()
         except Exception as e:
@@ -31,7 +27,7 @@ def render_saved_tab():
 
     # List saved searches
     try:
-        saved_list = sb.table("saved_searches").select("*").eq("user_id", uid).order("created_at", desc=True).execute().data
+        saved_list = load_saved_searches(sb, uid)
     except Exception as e:
         st.error(f"Failed to load saved searches: {e}")
         return
@@ -42,18 +38,18 @@ def render_saved_tab():
 
     for s in saved_list:
         with st.container(border=True):
-            st.write(f"🔎 **{s.get('query') or 'Any'}** — **{s.get('city') or 'All cities'}** — {', '.join(s.get('ltypes') or [])}")
+            st.write(f"🔎 **{s.query or 'Any'}** — **{s.city or 'All cities'}** — {', '.join(s.ltypes)}")
             cols = st.columns([1, 1])
             with cols[0]:
-                if st.button("Set as active filter", key=f"apply_{s['id']}"):
+                if st.button("Set as active filter", key=f"apply_{s.id}"):
                     # Pass the query back to Browse tab via session override
-                    if s.get("query"):
-                        st.session_state["text_q_override"] = s.get("query")
+                    if s.query:
+                        st.session_state["text_q_override"] = s.query
                     st.success("Applied! Go to Browse to see results.")
             with cols[1]:
-                if st.button("Delete", key=f"del_{s['id']}"):
+                if st.button("Delete", key=f"del_{s.id}"):
                     try:
-                        sb.table("saved_searches").delete().eq("id", s['id']).execute()
+                        delete_saved_search(sb, s.id)
                         st.rerun()
                     except Exception as e:
                         st.error(f"Delete failed: {e}")
@@ -1,13 +1,42 @@
-import base64
+import base64, hashlib, re
 from pathlib import Path
 import streamlit as st
 
-def load_css(path: str = "lib/ui/styles.css"):
+STATIC_DIR = Path("static")
+
+def _minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+@st.cache_resource(show_spinner=False)
+def css_bundle(path: str = "lib/ui/styles.css") -> str:
+    """The stylesheet, read and minified once per process."""
     with open(path, "r", encoding="utf-8") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+        return f"<style>{_minify_css(f.read())}</style>"
+
+def load_css(path: str = "lib/ui/styles.css"):
+    st.markdown(css_bundle(path), unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
 def img_b64(path: str) -> str:
     p = Path(path)
     if not p.exists():
         return ""
     return base64.b64encode(p.read_bytes()).decode("utf-8")
+
+@st.cache_resource(show_spinner=False)
+def asset_url(name: str) -> str:
+    """URL for a file in ./static, versioned by content hash so it can be cached indefinitely.
+
+    Falls back to an inline data URI when static serving is turned off.
+    """
+    p = STATIC_DIR / name
+    if not p.exists():
+        return ""
+    if not st.get_option("server.enableStaticServing"):
+        mime = "image/png" if p.suffix == ".png" else "application/octet-stream"
+        return f"data:{mime};base64,{img_b64(str(p))}"
+    digest = hashlib.sha256(p.read_bytes()).hexdigest()[:12]
+    return f"app/static/{name}?v={digest}"
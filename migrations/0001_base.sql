@@ -0,0 +1,74 @@
+-- 0001: profiles, listings, chats, messages (gen_random_uuid() is built in since Postgres 13)
+
+create table if not exists public.profiles (
+  id uuid primary key references auth.users(id) on delete cascade,
+  display_name text,
+  city text,
+  bio text,
+  role_flags integer not null default 0,
+  upi_id text,
+  avatar_url text,
+  created_at timestamptz not null default now()
+);
+
+create table if not exists public.listings (
+  id uuid primary key default gen_random_uuid(),
+  owner uuid references public.profiles(id) on delete cascade,
+  ltype text not null check (ltype in ('rent', 'sell', 'commission')),
+  title text not null,
+  description text,
+  price numeric not null default 0,
+  price_unit text not null default 'fixed' check (price_unit in ('day', 'fixed')),
+  city text,
+  franchise text,
+  "character" text,
+  handmade boolean,
+  source text check (source in ('handmade', 'bought')),
+  tags text[] not null default '{}',
+  images text[] not null default '{}',
+  quantity integer not null default 1,
+  status text not null default 'active' check (status in ('active', 'sold_out', 'paused')),
+  created_at timestamptz not null default now()
+);
+
+create table if not exists public.chats (
+  id uuid primary key default gen_random_uuid(),
+  listing uuid references public.listings(id) on delete cascade,
+  buyer uuid references public.profiles(id) on delete cascade,
+  seller uuid references public.profiles(id) on delete cascade,
+  last_msg timestamptz,
+  updated_at timestamptz not null default now()
+);
+
+create table if not exists public.messages (
+  id uuid primary key default gen_random_uuid(),
+  chat uuid not null references public.chats(id) on delete cascade,
+  sender uuid references public.profiles(id) on delete cascade,
+  text text not null,
+  created_at timestamptz not null default now()
+);
+
+alter table public.profiles enable row level security;
+alter table public.listings enable row level security;
+alter table public.chats enable row level security;
+alter table public.messages enable row level security;
+
+drop policy if exists "profiles read" on public.profiles;
+create policy "profiles read" on public.profiles for select using (true);
+drop policy if exists "profiles write" on public.profiles;
+create policy "profiles write" on public.profiles for all using (auth.uid() = id) with check (auth.uid() = id);
+
+drop policy if exists "listings read" on public.listings;
+create policy "listings read" on public.listings for select using (status = 'active' or auth.uid() = owner);
+drop policy if exists "listings write" on public.listings;
+create policy "listings write" on public.listings for all using (auth.uid() = owner) with check (auth.uid() = owner);
+
+drop policy if exists "chats participants" on public.chats;
+create policy "chats participants" on public.chats for all
+  using (auth.uid() in (buyer, seller)) with check (auth.uid() in (buyer, seller));
+
+drop policy if exists "messages participants" on public.messages;
+create policy "messages participants" on public.messages for all
+  using (exists (select 1 from public.chats c where c.id = chat and auth.uid() in (c.buyer, c.seller)))
+  with check (auth.uid() = sender
+              and exists (select 1 from public.chats c where c.id = chat and auth.uid() in (c.buyer, c.seller)));
@@ -0,0 +1,16 @@
+-- 0002: saved searches
+create table if not exists public.saved_searches (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid references public.profiles(id) on delete cascade,
+  city text,
+  ltypes text[] default '{"rent","sell","commission"}',
+  query text,
+  created_at timestamptz default now(),
+  last_seen timestamptz default now()
+);
+
+alter table public.saved_searches enable row level security;
+drop policy if exists "saved searches read" on public.saved_searches;
+create policy "saved searches read" on public.saved_searches for select using (auth.uid() = user_id);
+drop policy if exists "saved searches write" on public.saved_searches;
+create policy "saved searches write" on public.saved_searches for all using (auth.uid() = user_id) with check (auth.uid() = user_id);
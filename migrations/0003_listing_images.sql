@@ -0,0 +1,5 @@
+-- 0003: listing images — per-image renditions plus a denormalised grid thumbnail
+alter table public.listings
+  add column if not exists image_renditions jsonb not null default '[]'::jsonb,
+  add column if not exists thumb_url text;
+update public.listings set thumb_url = images[1] where thumb_url is null and cardinality(images) > 0;
@@ -0,0 +1,46 @@
+-- 0004: listing search — full-text + trigram over title, franchise, character and tags
+create extension if not exists pg_trgm;
+
+create or replace function public.listing_search_text(title text, franchise text, "character" text, tags text[])
+returns text language sql immutable as $$
+  select lower(concat_ws(' ', title, franchise, "character", array_to_string(tags, ' ')))
+$$;
+
+alter table public.listings
+  add column if not exists search_text text
+    generated always as (public.listing_search_text(title, franchise, "character", tags)) stored,
+  add column if not exists search_tsv tsvector
+    generated always as (to_tsvector('simple'::regconfig, public.listing_search_text(title, franchise, "character", tags))) stored;
+
+create index if not exists listings_search_tsv_idx on public.listings using gin(search_tsv);
+create index if not exists listings_search_trgm_idx on public.listings using gin(search_text gin_trgm_ops);
+
+-- Ranked, typo-tolerant search. Word matches rank first; trigram word similarity catches misspellings.
+drop function if exists public.search_listings(text, text, text[], timestamptz, int, int);
+create or replace function public.search_listings(
+  q text,
+  p_city text default null,
+  p_ltypes text[] default null,
+  p_since timestamptz default null,
+  p_limit int default 24,
+  p_offset int default 0
+)
+returns table (
+  id uuid, title text, thumb_url text, price numeric, price_unit text, ltype text,
+  city text, franchise text, "character" text, created_at timestamptz, rank real
+)
+language sql stable as $$
+  with p as (select websearch_to_tsquery('simple', q) as tsq, lower(trim(q)) as lq)
+  select l.id, l.title::text, l.thumb_url, l.price::numeric, l.price_unit::text, l.ltype::text,
+         l.city::text, l.franchise::text, l."character"::text, l.created_at,
+         (ts_rank(l.search_tsv, p.tsq) + word_similarity(p.lq, l.search_text))::real as rank
+  from public.listings l, p
+  where l.status = 'active'
+    and (p_city is null or l.city = p_city)
+    and (p_ltypes is null or l.ltype = any(p_ltypes))
+    and (p_since is null or l.created_at >= p_since)
+    and (l.search_tsv @@ p.tsq or p.lq <% l.search_text)
+  order by rank desc, l.created_at desc, l.id desc
+  limit least(greatest(p_limit, 1), 100) offset greatest(p_offset, 0)
+$$;
+grant execute on function public.search_listings(text, text, text[], timestamptz, int, int) to anon, authenticated;
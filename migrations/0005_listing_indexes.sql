@@ -0,0 +1,21 @@
+-- 0005: indexes for the access paths the app uses
+-- Browse feed: status = 'active' [+ city] [+ ltype in (...)] order by created_at desc, id desc.
+-- Partial on active rows so sold-out/paused listings don't bloat the hot indexes.
+create index if not exists listings_active_feed_idx
+  on public.listings (created_at desc, id desc) where status = 'active';
+create index if not exists listings_active_city_feed_idx
+  on public.listings (city, created_at desc, id desc) include (ltype) where status = 'active';
+create index if not exists listings_active_ltype_feed_idx
+  on public.listings (ltype, created_at desc, id desc) where status = 'active';
+-- Alerts (created_at >= last_seen) and the newest-listing probe ride listings_active_feed_idx.
+-- Backfill walks every row in (created_at, id) order.
+create index if not exists listings_created_id_idx on public.listings (created_at, id);
+create index if not exists listings_owner_idx on public.listings (owner, created_at desc);
+
+drop index if exists public.saved_searches_user_idx;
+create index if not exists saved_searches_user_created_idx on public.saved_searches (user_id, created_at desc);
+
+create index if not exists chats_buyer_updated_idx on public.chats (buyer, updated_at desc);
+create index if not exists chats_seller_updated_idx on public.chats (seller, updated_at desc);
+create index if not exists chats_listing_idx on public.chats (listing);
+create index if not exists messages_chat_created_idx on public.messages (chat, created_at, id);
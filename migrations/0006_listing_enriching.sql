@@ -0,0 +1,5 @@
+-- 0006: listings are inserted as 'enriching' and flipped to 'active' by the job worker
+alter table public.listings drop constraint if exists listings_status_check;
+alter table public.listings add constraint listings_status_check
+  check (status in ('active', 'sold_out', 'paused', 'enriching'));
+create index if not exists listings_enriching_idx on public.listings (created_at) where status = 'enriching';
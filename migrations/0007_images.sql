@@ -0,0 +1,42 @@
+-- 0007: content-addressed images. One row per distinct upload (sha256 of the original
+-- bytes) with its renditions and a 64-bit dHash. The hash is split into eight 8-bit bands
+-- so near-identical photos (Hamming distance <= 7 guarantees a shared band) are found
+-- through a GIN index instead of a scan.
+create or replace function public.dhash_bands(h bigint) returns int[] language sql immutable as $$
+  select array_agg((i << 8) | ((h >> (i * 8)) & 255)::int order by i) from generate_series(0, 7) as i
+$$;
+
+create table if not exists public.images (
+  sha256 text primary key,
+  dhash bigint not null,
+  dhash_bands int[] generated always as (public.dhash_bands(dhash)) stored,
+  renditions jsonb not null,
+  width integer,
+  height integer,
+  first_owner uuid references public.profiles(id) on delete set null,
+  created_at timestamptz not null default now()
+);
+create index if not exists images_dhash_bands_idx on public.images using gin(dhash_bands);
+
+alter table public.images enable row level security;
+drop policy if exists "images read" on public.images;
+create policy "images read" on public.images for select using (true);
+drop policy if exists "images insert" on public.images;
+create policy "images insert" on public.images for insert with check (auth.uid() = first_owner);
+
+alter table public.listings add column if not exists image_shas text[] not null default '{}';
+create index if not exists listings_image_shas_idx on public.listings using gin(image_shas);
+
+-- Visually near-identical images and the active listings using them.
+create or replace function public.similar_images(p_dhash bigint, p_max_distance int default 6, p_limit int default 20)
+returns table (sha256 text, distance int, listing uuid, owner uuid, title text)
+language sql stable as $$
+  select i.sha256, bit_count((i.dhash # p_dhash)::bit(64))::int as distance, l.id, l.owner, l.title::text
+  from public.images i
+  left join public.listings l on l.image_shas @> array[i.sha256] and l.status = 'active'
+  where i.dhash_bands && public.dhash_bands(p_dhash)
+    and bit_count((i.dhash # p_dhash)::bit(64)) <= least(p_max_distance, 7)
+  order by distance, l.created_at desc
+  limit least(greatest(p_limit, 1), 100)
+$$;
+grant execute on function public.similar_images(bigint, int, int) to anon, authenticated;
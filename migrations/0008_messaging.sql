@@ -0,0 +1,46 @@
+-- 0008: messaging. Per-chat unread counters and the last-message preview are maintained
+-- by a trigger on insert, so the inbox never counts messages.
+alter table public.chats
+  add column if not exists last_text text,
+  add column if not exists buyer_unread integer not null default 0,
+  add column if not exists seller_unread integer not null default 0;
+
+create unique index if not exists chats_listing_buyer_key on public.chats (listing, buyer);
+create index if not exists chats_buyer_unread_idx on public.chats (buyer) where buyer_unread > 0;
+create index if not exists chats_seller_unread_idx on public.chats (seller) where seller_unread > 0;
+
+create or replace function public.on_message_insert() returns trigger
+language plpgsql security definer set search_path = public as $$
+begin
+  update public.chats c
+     set last_msg = new.created_at,
+         updated_at = new.created_at,
+         last_text = left(new.text, 140),
+         buyer_unread = c.buyer_unread + (new.sender is distinct from c.buyer)::int,
+         seller_unread = c.seller_unread + (new.sender is distinct from c.seller)::int
+   where c.id = new.chat;
+  return new;
+end $$;
+
+drop trigger if exists messages_after_insert on public.messages;
+create trigger messages_after_insert after insert on public.messages
+  for each row execute function public.on_message_insert();
+
+-- Zero the caller's side of a chat's unread counter.
+create or replace function public.mark_chat_read(p_chat uuid) returns void
+language sql security invoker as $$
+  update public.chats
+     set buyer_unread = case when auth.uid() = buyer then 0 else buyer_unread end,
+         seller_unread = case when auth.uid() = seller then 0 else seller_unread end
+   where id = p_chat and auth.uid() in (buyer, seller)
+$$;
+
+-- Total unread messages for the caller; reads only chats with a non-zero counter.
+create or replace function public.unread_count() returns integer
+language sql stable security invoker as $$
+  select coalesce((select sum(buyer_unread) from public.chats where buyer = auth.uid() and buyer_unread > 0), 0)::int
+       + coalesce((select sum(seller_unread) from public.chats where seller = auth.uid() and seller_unread > 0), 0)::int
+$$;
+
+grant execute on function public.mark_chat_read(uuid) to authenticated;
+grant execute on function public.unread_count() to authenticated;
@@ -0,0 +1,4 @@
+-- 0009: bulk import. Each imported row carries a per-seller reference, so re-running an
+-- import (after a crash or a fixed CSV) inserts only the rows that are not there yet.
+alter table public.listings add column if not exists import_ref text;
+create unique index if not exists listings_owner_import_ref_key on public.listings (owner, import_ref);
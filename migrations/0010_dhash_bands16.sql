@@ -0,0 +1,39 @@
+-- 0010: dHash lookups by four 16-bit bands on btree expression indexes. The GIN over eight
+-- 8-bit bands matched ~1/256 of all images per band (more for real photos, whose hash bits
+-- are correlated), and the planner has no per-element stats for && on rare values, so
+-- similar_images ran as a seq scan. Each 16-bit band matches ~1/65536 of the table, and
+-- ANALYZE keeps stats on the expression indexes, so `band = any(probes)` is estimated
+-- correctly and planned as a BitmapOr of four index scans.
+-- Lookups probe every band value within one bit of the query's: a hash within Hamming
+-- distance 7 differs in at most one bit in some band, so the guaranteed radius stays 7.
+drop index if exists public.images_dhash_bands_idx;
+alter table public.images drop column if exists dhash_bands;
+drop function if exists public.dhash_bands(bigint);
+
+-- Band `band` (0-3) of h, and every value within one bit of it (17 values).
+create or replace function public.dhash_probes(h bigint, band int) returns int[] language sql immutable parallel safe as $$
+  select array_agg((((h >> (band * 16)) & 65535)::int) # (case when b < 16 then 1 << b else 0 end))
+  from generate_series(0, 16) as b
+$$;
+
+-- The expressions must stay identical to the ones in similar_images for the indexes to match.
+create index if not exists images_dhash_band0_idx on public.images ((dhash & 65535));
+create index if not exists images_dhash_band1_idx on public.images (((dhash >> 16) & 65535));
+create index if not exists images_dhash_band2_idx on public.images (((dhash >> 32) & 65535));
+create index if not exists images_dhash_band3_idx on public.images (((dhash >> 48) & 65535));
+analyze public.images;
+
+create or replace function public.similar_images(p_dhash bigint, p_max_distance int default 6, p_limit int default 20)
+returns table (sha256 text, distance int, listing uuid, owner uuid, title text)
+language sql stable as $$
+  select i.sha256, bit_count((i.dhash # p_dhash)::bit(64))::int as distance, l.id, l.owner, l.title::text
+  from public.images i
+  left join public.listings l on l.image_shas @> array[i.sha256] and l.status = 'active'
+  where ((i.dhash & 65535) = any(public.dhash_probes(p_dhash, 0))
+      or ((i.dhash >> 16) & 65535) = any(public.dhash_probes(p_dhash, 1))
+      or ((i.dhash >> 32) & 65535) = any(public.dhash_probes(p_dhash, 2))
+      or ((i.dhash >> 48) & 65535) = any(public.dhash_probes(p_dhash, 3)))
+    and bit_count((i.dhash # p_dhash)::bit(64)) <= least(p_max_distance, 7)
+  order by distance, l.created_at desc
+  limit least(greatest(p_limit, 1), 100)
+$$;
@@ -0,0 +1,99 @@
+"""Backfill `tags` / `franchise` for listings published without auto-tagging.
+
+Walks `listings` in (created_at, id) order, classifies descriptions in batches
+(one zero-shot request per batch) and writes the results back. Progress is
+checkpointed after every chunk, so an interrupted run resumes where it stopped. If the
+hosted model fails, the run stops before checkpointing that chunk, so a rerun retries it.
+
+    python -m tools.backfill_tags --chunk 200 --batch 16
+"""
+import argparse, json, os, sys, time
+
+from lib.sb import service_client
+from lib.data import listing_history
+from lib.ai import classify_batch
+from lib.local_ai import build_classifier, HISTORY_LIMIT
+
+COLUMNS = "id,title,description,franchise,character,tags,created_at"
+
+def load_checkpoint(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"cursor": None, "scanned": 0, "updated": 0}
+
+def save_checkpoint(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def fetch_chunk(sb, cursor, size):
+    q = sb.table("listings").select(COLUMNS)
+    if cursor:
+        ts, lid = cursor
+        # The gte is implied by the or_, but only it can bound the index scan.
+        q = q.gte("created_at", ts).or_(f'created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{lid})')
+    return q.order("created_at").order("id").limit(size).execute().data or []
+
+def listing_text(row) -> str:
+    parts = [row.get("title"), row.get("franchise"), row.get("character"), row.get("description")]
+    return "\n".join(p for p in parts if p)[:1000]
+
+def patch_for(row, result):
+    patch = {}
+    if not row.get("tags") and result["tags"]:
+        patch["tags"] = result["tags"]
+    if not row.get("franchise") and result["franchises"]:
+        patch["franchise"] = result["franchises"][0]
+    return patch
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunk", type=int, default=200, help="rows fetched per page")
+    ap.add_argument("--batch", type=int, default=16, help="descriptions per inference request")
+    ap.add_argument("--checkpoint", default=".cache/backfill_tags.json")
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    ap.add_argument("--local-only", action="store_true", help="skip the hosted model, lexicon only")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
+
+    sb = service_client()
+    clf = build_classifier(listing_history(sb, HISTORY_LIMIT, active_only=False))
+    state = {"cursor": None, "scanned": 0, "updated": 0} if args.restart else load_checkpoint(args.checkpoint)
+    started = time.time()
+
+    while True:
+        rows = fetch_chunk(sb, state["cursor"], args.chunk)
+        if not rows:
+            break
+        todo = [r for r in rows if not r.get("tags") or not r.get("franchise")]
+        for i in range(0, len(todo), args.batch):
+            group = todo[i:i + args.batch]
+            try:
+                results = classify_batch([listing_text(r) for r in group], refine=not args.local_only,
+                                         classifier=clf, strict=True)
+            except Exception as e:
+                print(f"hosted model failed ({e!r}); stopping, rerun to resume from the last checkpoint",
+                      file=sys.stderr)
+                return 1
+            for row, result in zip(group, results):
+                patch = patch_for(row, result)
+                if not patch:
+                    continue
+                if not args.dry_run:
+                    sb.table("listings").update(patch).eq("id", row["id"]).execute()
+                state["updated"] += 1
+        state["scanned"] += len(rows)
+        state["cursor"] = [rows[-1]["created_at"], rows[-1]["id"]]
+        if not args.dry_run:
+            save_checkpoint(args.checkpoint, state)
+        print(f"scanned {state['scanned']}  updated {state['updated']}  ({time.time() - started:.1f}s)", file=sys.stderr)
+
+    print(json.dumps(state))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
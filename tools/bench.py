@@ -0,0 +1,142 @@
+"""Headless benchmarks for the Browse, Post and Saved-search paths.
+
+Drives app.py through streamlit.testing.v1.AppTest against the in-process fakes
+in tools/fakes.py, so results measure the app's own work and its round-trip
+pattern rather than the network:
+
+    python -m tools.bench --sizes 1000 10000 --saved 20 --latency-ms 5 --out bench.json
+    python -m tools.bench --baseline bench.json          # fail if slower than the baseline
+
+Reported per scenario: p50/p95 rerun latency, backend and HF calls per rerun,
+bytes per rerun and peak traced memory.
+"""
+import argparse, json, os, statistics, sys, tempfile, time, tracemalloc
+from types import SimpleNamespace
+
+# The AI cache path is read at import time; keep benchmark runs away from the real cache.
+os.environ.setdefault("AI_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="rentacos-bench-"), "ai.sqlite3"))
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import lib.hf, lib.sb
+from lib.qcache import LISTING_CACHE
+from tools.fakes import FakeHFSession, FakeSupabase, seed
+
+USER_ID = "bench-user"
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+COMPARED = ("p50_ms", "p95_ms", "calls_per_rerun", "bytes_per_rerun", "hf_calls_per_rerun")
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+def _new_app(signed_in):
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets["supabase"] = {"url": "https://fake.local", "anon_key": "bench"}
+    at.secrets["HF_TOKEN"] = "bench"
+    if signed_in:
+        at.session_state["user"] = SimpleNamespace(id=USER_ID, email="bench@example.com")
+    return at
+
+# Each scenario: (signed_in, setup(at) run once before timing, step(at, i) timed per rerun)
+SCENARIOS = {
+    "browse_rerun": (False, None, lambda at, i: at.run()),
+    "browse_filter": (False, None, lambda at, i: _widget(at.selectbox, "City").select(
+        ["All", "Mumbai", "Delhi", "Pune"][i % 4]).run()),
+    "browse_search": (False, None, lambda at, i: _widget(at.text_input, "Search title / franchise / character")
+                      .input(["gojo", "katana", "naruto wig", "sword"][i % 4]).run()),
+    "browse_alerts": (True, None, lambda at, i: at.run()),
+    "post_typing": (True, None, lambda at, i: _widget(at.text_input, "Title *").input("Gojo blindfold"[: i % 14 + 1]).run()),
+    "saved_rerun": (True, None, lambda at, i: at.run()),
+}
+
+def run_scenario(name, db, hf, reruns):
+    signed_in, setup, step = SCENARIOS[name]
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    LISTING_CACHE.invalidate()
+    at = _new_app(signed_in)
+    at.run()
+    if setup:
+        setup(at)
+    if at.exception:
+        raise RuntimeError(f"{name}: app raised {at.exception}")
+    db.stats.reset(); hf.stats.reset()
+    tracemalloc.start()
+    latencies = []
+    for i in range(reruns):
+        t0 = time.perf_counter()
+        step(at, i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if at.exception:
+        raise RuntimeError(f"{name}: app raised {at.exception}")
+    backend, ai = db.stats.snapshot(), hf.stats.snapshot()
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(_pct(latencies, 0.95), 2),
+        "calls_per_rerun": round(backend["calls"] / reruns, 2),
+        "bytes_per_rerun": int(backend["bytes"] / reruns),
+        "hf_calls_per_rerun": round(ai["calls"] / reruns, 2),
+        "peak_mem_kb": int(peak / 1024),
+        "calls_by_kind": backend["by_kind"],
+    }
+
+def compare(results, baseline, tolerance):
+    """Lines describing metrics that regressed by more than `tolerance` (fraction)."""
+    problems = []
+    for key, cur in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        for metric in COMPARED:
+            a, b = old.get(metric, 0), cur.get(metric, 0)
+            if b > a * (1 + tolerance) and b - a > 0.5:
+                problems.append(f"{key} {metric}: {a} -> {b}")
+    return problems
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rent-a-Cos rerun benchmarks")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--saved", type=int, default=20, help="saved searches for the signed-in user")
+    ap.add_argument("--reruns", type=int, default=20)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="injected per-call Supabase latency")
+    ap.add_argument("--hf-latency-ms", type=float, default=0.0, help="injected per-call HF latency")
+    ap.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", help="compare against a previous --out file")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (0.2 = 20%%)")
+    args = ap.parse_args(argv)
+
+    results = {}
+    hf = FakeHFSession(args.hf_latency_ms)
+    lib.hf.use_session(hf)
+    for size in args.sizes:
+        db = seed(FakeSupabase(args.latency_ms), size, args.saved, USER_ID)
+        lib.sb.use_client(db)
+        for name in args.scenarios:
+            key = f"{name}@{size}"
+            results[key] = run_scenario(name, db, hf, args.reruns)
+            r = results[key]
+            print(f"{key:<24} p50 {r['p50_ms']:>8.1f}ms  p95 {r['p95_ms']:>8.1f}ms  "
+                  f"calls {r['calls_per_rerun']:>5}  bytes {r['bytes_per_rerun']:>9}  "
+                  f"hf {r['hf_calls_per_rerun']:>4}  peak {r['peak_mem_kb']:>7}KB")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for p in problems:
+            print("REGRESSION", p, file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Import listings in bulk from a CSV and a ZIP of photos.
+
+Validates every row up front, uploads photos through lib/images (content-addressed,
+so re-runs skip them) and inserts listings in chunks with the service-role client.
+Rows already imported for the owner are skipped, so a failed run can just be repeated:
+
+    python -m tools.bulk_import listings.csv --images photos.zip --owner <profile uuid>
+    python -m tools.bulk_import listings.csv --images photos.zip --check   # validate only
+"""
+import argparse, json, sys
+
+from lib.bulk import CHUNK, IMAGE_WORKERS, ImageArchive, import_listings, read_csv, validate
+from lib.sb import service_client
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("csv")
+    ap.add_argument("--images", help="ZIP of the photos named in the `images` column")
+    ap.add_argument("--owner", help="profile id the listings belong to (required unless --check)")
+    ap.add_argument("--check", action="store_true", help="validate and report, insert nothing")
+    ap.add_argument("--chunk", type=int, default=CHUNK, help="rows per insert request")
+    ap.add_argument("--workers", type=int, default=IMAGE_WORKERS, help="rows whose photos are processed at once")
+    ap.add_argument("--enrich", action="store_true",
+                    help="queue rows without tags/franchise for the enrichment worker (tools.worker)")
+    ap.add_argument("--errors", help="write per-row errors to this CSV")
+    args = ap.parse_args(argv)
+    if not args.check and not args.owner:
+        ap.error("--owner is required")
+
+    df = read_csv(args.csv)
+    images = ImageArchive(args.images) if args.images else None
+    if args.check:
+        rows, errors = validate(df, set(images.names) if images else None)
+        print(json.dumps({"rows": len(df), "valid": len(rows), "errors": len(errors)}))
+    else:
+        report = import_listings(service_client(), args.owner, df, images, enrich=args.enrich, chunk=args.chunk,
+                                 workers=args.workers,
+                                 on_progress=lambda done, total: print(f"{done}/{total}", file=sys.stderr))
+        errors = report.error_frame()
+        print(json.dumps({"rows": report.total, "inserted": report.inserted, "skipped": report.skipped,
+                          "queued": report.queued, "errors": len(errors)}))
+    if len(errors):
+        if args.errors:
+            errors.to_csv(args.errors, index=False)
+        else:
+            print(errors.to_string(index=False), file=sys.stderr)
+    return 1 if len(errors) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
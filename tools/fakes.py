@@ -0,0 +1,336 @@
+"""In-process stand-ins for Supabase (PostgREST + Storage) and the Hugging Face API.
+
+They implement just the query-builder surface the app uses, count every
+round-trip and the bytes it would have moved, and can sleep to mimic network
+latency. Used by tools/bench.py; install with `lib.sb.use_client(FakeSupabase(...))`
+and `lib.hf.use_session(FakeHFSession(...))`.
+"""
+import json, random, re, threading, time, uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from lib.constants import FRANCHISE_CANDIDATES, POPULAR_CHARACTERS
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls, self.bytes, self.by_kind = 0, 0, {}
+
+    def record(self, kind, payload):
+        size = len(json.dumps(payload, default=str)) if not isinstance(payload, (bytes, bytearray)) else len(payload)
+        with self._lock:
+            self.calls += 1
+            self.bytes += size
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"calls": self.calls, "bytes": self.bytes, "by_kind": dict(self.by_kind)}
+
+# ---------------------------------------------------------------- PostgREST
+
+_COND = re.compile(r'^([\w.]+?)\.(eq|neq|lt|lte|gt|gte|ilike|is)\.(.*)$')
+
+def _split_top(expr):
+    parts, depth, buf, quoted = [], 0, "", False
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        if not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(buf); buf = ""
+        else:
+            buf += ch
+    if buf:
+        parts.append(buf)
+    return parts
+
+def _compare(value, op, target):
+    if op == "is":
+        return value is None if target == "null" else value == (target == "true")
+    if value is None:
+        return False
+    if op == "ilike":
+        return target.strip("*").lower() in str(value).lower()
+    value, target = str(value), str(target)
+    return {"eq": value == target, "neq": value != target, "lt": value < target,
+            "lte": value <= target, "gt": value > target, "gte": value >= target}[op]
+
+def _logic(expr, mode="or"):
+    """Compile a PostgREST logic tree ("a.eq.1,and(b.lt.2,c.gt.3)") into a row predicate."""
+    preds = []
+    for part in _split_top(expr):
+        part = part.strip()
+        for sub in ("and", "or"):
+            if part.startswith(sub + "("):
+                preds.append(_logic(part[len(sub) + 1:-1], sub))
+                break
+        else:
+            col, op, target = _COND.match(part).groups()
+            target = target.strip('"')
+            preds.append(lambda r, c=col, o=op, t=target: _compare(r.get(c), o, t))
+    combine = any if mode == "or" else all
+    return lambda r: combine(p(r) for p in preds)
+
+def _public(row):
+    return {k: v for k, v in row.items() if not k.startswith("_")}
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db, self.table = db, table
+        self.filters, self.orders = [], []
+        self.columns, self.limit_n, self.offset_n = None, None, 0
+        self.op, self.payload = "select", None
+
+    # --- builder surface ------------------------------------------------
+    def select(self, columns="*", count=None):
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def _f(self, pred):
+        self.filters.append(pred); return self
+
+    def eq(self, c, v): return self._f(lambda r: r.get(c) == v)
+    def neq(self, c, v): return self._f(lambda r: r.get(c) != v)
+    def gt(self, c, v): return self._f(lambda r: r.get(c) is not None and str(r[c]) > str(v))
+    def gte(self, c, v): return self._f(lambda r: r.get(c) is not None and str(r[c]) >= str(v))
+    def lt(self, c, v): return self._f(lambda r: r.get(c) is not None and str(r[c]) < str(v))
+    def lte(self, c, v): return self._f(lambda r: r.get(c) is not None and str(r[c]) <= str(v))
+    def in_(self, c, vs):
+        vs = set(vs); return self._f(lambda r: r.get(c) in vs)
+    def is_(self, c, v): return self._f(lambda r: r.get(c) is None if v in (None, "null") else r.get(c) == v)
+    def contains(self, c, vs):
+        vs = set(vs); return self._f(lambda r: vs.issubset(r.get(c) or []))
+    def or_(self, expr): return self._f(_logic(expr))
+    def order(self, c, desc=False):
+        self.orders.append((c, desc)); return self
+    def limit(self, n):
+        self.limit_n = n; return self
+    def range(self, start, end):
+        self.offset_n, self.limit_n = start, end - start + 1; return self
+
+    def insert(self, data):
+        self.op, self.payload = "insert", data; return self
+    def upsert(self, data, on_conflict=None, ignore_duplicates=False):
+        self.op, self.payload = "upsert", (data, on_conflict, ignore_duplicates); return self
+    def update(self, data):
+        self.op, self.payload = "update", data; return self
+    def delete(self):
+        self.op = "delete"; return self
+
+    # --- execution --------------------------------------------------------
+    def _matching(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        return [r for r in rows if all(p(r) for p in self.filters)]
+
+    def execute(self):
+        self.db._sleep()
+        data = getattr(self, "_" + self.op)()
+        self.db.stats.record(f"{self.op}:{self.table}", data)
+        return SimpleNamespace(data=data, count=len(data))
+
+    def _select(self):
+        rows = self._matching()
+        for col, desc in reversed(self.orders):
+            rows.sort(key=lambda r: (r.get(col) is None, r.get(col) if r.get(col) is not None else ""), reverse=desc)
+        end = None if self.limit_n is None else self.offset_n + self.limit_n
+        rows = rows[self.offset_n:end]
+        if self.columns:
+            return [{c: r.get(c) for c in self.columns} for r in rows]
+        return [_public(r) for r in rows]
+
+    def _insert(self):
+        items = self.payload if isinstance(self.payload, list) else [self.payload]
+        out = [self.db.add_row(self.table, item) for item in items]
+        return out
+
+    def _upsert(self):
+        data, on_conflict, ignore = self.payload
+        items = data if isinstance(data, list) else [data]
+        keys = [k.strip() for k in (on_conflict or "id").split(",")]
+        rows, out = self.db.tables.setdefault(self.table, []), []
+        for item in items:
+            hit = next((r for r in rows if all(r.get(k) == item.get(k) for k in keys)), None)
+            if hit is None:
+                out.append(self.db.add_row(self.table, item))
+            elif not ignore:
+                hit.update(item); out.append(_public(hit))
+        return out
+
+    def _update(self):
+        rows = self._matching()
+        for r in rows:
+            r.update(self.payload)
+        return [_public(r) for r in rows]
+
+    def _delete(self):
+        doomed = self._matching()
+        ids = {id(r) for r in doomed}
+        self.db.tables[self.table] = [r for r in self.db.tables[self.table] if id(r) not in ids]
+        return [_public(r) for r in doomed]
+
+class FakeRPC:
+    def __init__(self, db, fn, params):
+        self.db, self.fn, self.params = db, fn, params
+
+    def execute(self):
+        self.db._sleep()
+        data = self.db.rpcs[self.fn](self.db, **self.params)
+        self.db.stats.record(f"rpc:{self.fn}", data)
+        return SimpleNamespace(data=data)
+
+class FakeBucket:
+    def __init__(self, db, name):
+        self.db, self.name = db, name
+
+    def upload(self, path, data, file_options=None):
+        self.db._sleep()
+        self.db.objects[(self.name, path)] = data
+        self.db.stats.record("storage:upload", data)
+        return SimpleNamespace(path=path)
+
+    def get_public_url(self, path):
+        return f"https://fake.local/storage/v1/object/public/{self.name}/{path}"
+
+    def list(self, path=None, options=None):
+        self.db._sleep()
+        prefix = (path or "").rstrip("/") + "/"
+        out = [{"name": p[len(prefix):]} for (b, p) in self.db.objects if b == self.name and p.startswith(prefix)]
+        self.db.stats.record("storage:list", out)
+        return out
+
+class FakeStorage:
+    def __init__(self, db):
+        self.db = db
+
+    def from_(self, bucket):
+        return FakeBucket(self.db, bucket)
+
+def _search_listings(db, q, p_city=None, p_ltypes=None, p_since=None, p_limit=24, p_offset=0, **_):
+    terms = (q or "").lower().split()
+    rows = [r for r in db.tables.get("listings", [])
+            if r.get("status") == "active"
+            and (not p_city or r.get("city") == p_city)
+            and (not p_ltypes or r.get("ltype") in p_ltypes)
+            and (not p_since or r["created_at"] >= p_since)
+            and all(t in r["_search"] for t in terms)]
+    rows.sort(key=lambda r: r["created_at"], reverse=True)
+    cols = ("id", "title", "thumb_url", "price", "price_unit", "ltype", "city", "franchise", "character", "created_at")
+    return [{**{c: r.get(c) for c in cols}, "rank": 1.0} for r in rows[p_offset:p_offset + min(p_limit, 100)]]
+
+class FakeSupabase:
+    """Minimal synchronous Supabase client backed by Python lists."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.tables, self.objects, self.stats = {}, {}, Stats()
+        self.rpcs = {"search_listings": _search_listings}
+        self.storage = FakeStorage(self)
+        self.auth = SimpleNamespace()
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def add_row(self, table, item):
+        row = {"id": str(uuid.uuid4()), "created_at": _ts(datetime.now(timezone.utc)), **item}
+        if table == "listings":
+            row.setdefault("status", "active")
+            row["_search"] = " ".join(str(row.get(k) or "") for k in ("title", "franchise", "character")).lower() \
+                + " " + " ".join(row.get("tags") or []).lower()
+        elif table == "chats":
+            row.setdefault("updated_at", row["created_at"])
+            row.update(buyer_unread=0, seller_unread=0, last_text=None, last_msg=None)
+        elif table == "messages":   # mirrors the messages_after_insert trigger (migration 0008)
+            for c in self.tables.get("chats", []):
+                if c["id"] == row["chat"]:
+                    c.update(updated_at=row["created_at"], last_msg=row["created_at"], last_text=row["text"][:140])
+                    c["buyer_unread"] += row["sender"] != c["buyer"]
+                    c["seller_unread"] += row["sender"] != c["seller"]
+        self.tables.setdefault(table, []).append(row)
+        return _public(row)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, fn, params=None):
+        return FakeRPC(self, fn, params or {})
+
+def _ts(d):
+    return d.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+CITIES = ["Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Pune", "Kolkata", "Chennai", "Remote"]
+ITEMS = ["wig", "katana", "blindfold", "cloak", "uniform", "mask", "staff", "figure", "headband", "boots"]
+
+def seed(db, n_listings, n_saved=0, user_id="bench-user", seed_value=7):
+    """Deterministic synthetic catalogue: n listings over the last ~90 days plus saved searches."""
+    rnd = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(n_listings):
+        fr = rnd.choice(FRANCHISE_CANDIDATES)
+        ch = rnd.choice(POPULAR_CHARACTERS.get(fr, [""]))
+        item = rnd.choice(ITEMS)
+        title = f"{ch or fr} {item}".strip()
+        row = {
+            "id": str(uuid.UUID(int=rnd.getrandbits(128))),
+            "owner": f"seller-{rnd.randrange(max(n_listings // 20, 1))}",
+            "ltype": rnd.choice(["rent", "sell", "commission"]),
+            "title": title, "description": f"{title} in great condition. " * 8,
+            "price": rnd.randrange(100, 5000, 50), "price_unit": rnd.choice(["day", "fixed"]),
+            "city": rnd.choice(CITIES), "franchise": fr, "character": ch,
+            "tags": [item, "cosplay"], "images": [f"https://fake.local/full/{i}.jpg"],
+            "thumb_url": f"https://fake.local/thumb/{i}.webp", "quantity": 1, "status": "active",
+            "created_at": _ts(now - timedelta(seconds=rnd.randrange(90 * 86400))),
+        }
+        row["_search"] = f"{title} {fr} {ch} {item} cosplay".lower()
+        rows.append(row)
+    db.tables["listings"] = rows
+    db.tables["saved_searches"] = [{
+        "id": str(uuid.UUID(int=rnd.getrandbits(128))), "user_id": user_id,
+        "city": rnd.choice([None] + CITIES), "ltypes": ["rent", "sell", "commission"],
+        "query": rnd.choice(["", "gojo", "katana", "wig", "naruto"]),
+        "created_at": _ts(now - timedelta(days=30)), "last_seen": _ts(now - timedelta(days=rnd.randrange(1, 30))),
+    } for _ in range(n_saved)]
+    db.stats.reset()
+    return db
+
+# ---------------------------------------------------------------- Hugging Face
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload, self.status_code = payload, status_code
+
+    def json(self):
+        return self._payload
+
+class FakeHFSession:
+    """Stands in for requests.Session in lib.hf; answers each model with canned output."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.stats = Stats()
+
+    def post(self, url, headers=None, json=None, data=None, timeout=None):
+        if self.latency:
+            time.sleep(self.latency)
+        model = url.rsplit("/models/", 1)[-1]
+        if "mnli" in model:
+            labels = json["parameters"]["candidate_labels"]
+            one = {"labels": labels, "scores": [round(1.0 / (i + 2), 3) for i in range(len(labels))]}
+            out = [dict(one, sequence=t) for t in json["inputs"]] if isinstance(json["inputs"], list) else one
+        elif "caption" in model:
+            out = [{"generated_text": "a person holding a sword"}]
+        elif "NER" in model:
+            out = []
+        else:
+            out = [{"generated_text": "Great condition, fits most sizes."}]
+        self.stats.record(model, data if data is not None else json)
+        return FakeResponse(out)
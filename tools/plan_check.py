@@ -0,0 +1,229 @@
+"""Check that every query the app issues is served by an index.
+
+Applies migrations/*.sql to a scratch Postgres database, seeds synthetic
+listings/saved searches/chats, then runs EXPLAIN (ANALYZE, BUFFERS) for the
+queries in lib/data and fails if any plan falls back to a sequential scan on
+an app table. Everything runs in one transaction that is rolled back at the end.
+
+    python -m tools.plan_check --dsn postgresql://postgres@localhost/rentacos_plan --listings 100000
+
+Needs `pip install "psycopg[binary]"`. Outside Supabase the `auth` schema,
+`auth.uid()` and the anon/authenticated roles are shimmed.
+"""
+import argparse, datetime as dt, glob, json, os, sys, time
+
+try:
+    import psycopg
+except ImportError:  # optional: only this tool needs a direct database connection
+    psycopg = None
+
+from lib.data import (CARD_COLUMNS, DETAIL_COLUMNS, ALERT_COLUMNS, HISTORY_COLUMNS, INDEX_COLUMNS, CHAT_COLUMNS,
+                      MESSAGE_COLUMNS)
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+APP_TABLES = {"listings", "saved_searches", "profiles", "chats", "messages", "images"}
+INLINED = {"search_listings", "similar_images"}   # SQL functions whose plans must stay visible
+
+AUTH_SHIM = """
+create schema if not exists auth;
+create table if not exists auth.users (id uuid primary key);
+create or replace function auth.uid() returns uuid language sql stable as
+  $$ select nullif(current_setting('request.jwt.claim.sub', true), '')::uuid $$;
+do $$ begin
+  if not exists (select from pg_roles where rolname = 'anon') then create role anon nologin; end if;
+  if not exists (select from pg_roles where rolname = 'authenticated') then create role authenticated nologin; end if;
+end $$;
+"""
+
+SEED = """
+insert into auth.users (id) select gen_random_uuid() from generate_series(1, %(users)s);
+insert into public.profiles (id, display_name, city) select id, 'user', 'Pune' from auth.users;
+with u as (select array_agg(id) as ids from public.profiles),
+     v as (select array['Bengaluru','Mumbai','Delhi','Hyderabad','Pune','Kolkata','Chennai','Remote'] as cities,
+                  array['Naruto','Jujutsu Kaisen','One Piece','Demon Slayer','Genshin Impact'] as fr,
+                  array['wig','katana','cloak','blindfold','armor'] as items)
+insert into public.listings (owner, ltype, title, description, price, price_unit, city, franchise, "character",
+                             tags, images, status, created_at)
+select u.ids[1 + g %% cardinality(u.ids)],
+       (array['rent','sell','commission'])[1 + g %% 3],
+       v.fr[1 + g %% 5] || ' ' || v.items[1 + (g / 5) %% 5] || ' ' || g,
+       'synthetic listing ' || g,
+       100 + (g * 37) %% 4900,
+       (array['day','fixed'])[1 + g %% 2],
+       v.cities[1 + (g / 3) %% 8],
+       v.fr[1 + g %% 5], 'character ' || (g %% 40),
+       array[v.items[1 + (g / 5) %% 5], 'cosplay'],
+       array['https://example.invalid/' || g || '.jpg'],
+       case when g %% 10 < 8 then 'active' when g %% 10 = 8 then 'sold_out' else 'paused' end,
+       now() - ((g::bigint * 7919) %% 15552000) * interval '1 second' - random() * interval '1 second'
+from generate_series(1, %(listings)s) g, u, v;
+insert into public.saved_searches (user_id, city, query, created_at, last_seen)
+select p.id, (array[null,'Pune','Mumbai'])[1 + s %% 3], (array['','naruto','katana wig'])[1 + s %% 3],
+       now() - interval '30 days', now() - (s %% 20) * interval '1 day'
+from public.profiles p, generate_series(1, %(saved)s) s;
+insert into public.chats (listing, buyer, seller, updated_at)
+select l.id, u.ids[1 + (l.rn * 7) %% cardinality(u.ids)], l.owner, l.created_at + interval '1 hour'
+from (select id, owner, created_at, row_number() over () as rn
+      from public.listings where status = 'active' limit %(chats)s) l,
+     (select array_agg(id) as ids from public.profiles) u;
+insert into public.messages (chat, sender, text, created_at)
+select c.id, c.buyer, 'hello ' || m, c.updated_at + m * interval '1 minute'
+from public.chats c, generate_series(1, 10) m;
+insert into public.images (sha256, dhash, renditions)
+select md5(g::text) || md5((g + 1)::text), ('x' || substr(md5('d' || g), 1, 16))::bit(64)::bigint, '{}'::jsonb
+from generate_series(1, %(listings)s / 2) g;
+update public.listings set image_shas = array[md5(left(id::text, 8)) || md5(right(id::text, 8))];
+analyze;
+"""
+
+def sample_params(cur):
+    """Realistic parameter values taken from the seeded data."""
+    cur.execute("select created_at, id from public.listings where status = 'active' and city = 'Pune' "
+                "order by created_at desc, id desc offset 200 limit 1")
+    ts, lid = cur.fetchone()
+    cur.execute("select created_at, id from public.listings where status = 'active' order by created_at desc, id desc "
+                "offset (select count(*) / 2 from public.listings where status = 'active') limit 1")   # far down "Load more"
+    deep_ts, deep_id = cur.fetchone()
+    cur.execute("select user_id from public.saved_searches limit 1")
+    uid = cur.fetchone()[0]
+    cur.execute("select sha256, dhash from public.images limit 1")
+    sha, dh = cur.fetchone()
+    cur.execute("select c.id, c.buyer, m.created_at, m.id from public.chats c join public.messages m on m.chat = c.id "
+                "order by m.created_at desc limit 1 offset 5")
+    chat, buyer, msg_ts, msg_id = cur.fetchone()
+    cur.execute("select updated_at, id from public.chats where buyer = %s order by updated_at desc limit 1", (buyer,))
+    chat_ts, chat_id = cur.fetchone()
+    cur.execute("select id from public.listings where status = 'active' limit 1")
+    return {"chat": chat, "buyer": buyer, "msg_ts": msg_ts, "msg_id": msg_id, "chat_ts": chat_ts, "chat_id": chat_id,
+            "deep_ts": deep_ts, "deep_id": deep_id, "sha": sha, "dhash": dh, "city": "Pune", "ltypes": ["rent", "sell"], "ts": ts, "lid": lid, "uid": uid,
+            "listing": cur.fetchone()[0], "since": dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=3),
+            "q": "naruto wig"}
+
+def _cols(spec):
+    return ", ".join(f'"{c}"' for c in spec.split(","))
+
+def queries(p):
+    """(name, sql, params) for each query shape issued through lib/data, as PostgREST renders it."""
+    card = _cols(CARD_COLUMNS)
+    keyset = "created_at <= %(ts)s and (created_at < %(ts)s or (created_at = %(ts)s and id < %(lid)s))"
+    order = "order by created_at desc, id desc"
+    chat, msg = _cols(CHAT_COLUMNS), _cols(MESSAGE_COLUMNS)
+    chat_keyset = ("updated_at <= %(chat_ts)s and "
+                   "(updated_at < %(chat_ts)s or (updated_at = %(chat_ts)s and id < %(chat_id)s))")
+    return [
+        ("feed", f"select {card} from public.listings where status = 'active' {order} limit 25", p),
+        ("feed_city", f"select {card} from public.listings where status = 'active' and city = %(city)s "
+                      f"{order} limit 25", p),
+        ("feed_types", f"select {card} from public.listings where status = 'active' and ltype = any(%(ltypes)s) "
+                       f"{order} limit 25", p),
+        ("feed_city_types_cursor", f"select {card} from public.listings where status = 'active' and city = %(city)s "
+                                   f"and ltype = any(%(ltypes)s) and {keyset} {order} limit 25", p),
+        ("feed_deep_cursor", f"select {card} from public.listings where status = 'active' "
+                             "and created_at <= %(deep_ts)s and (created_at < %(deep_ts)s or "
+                             f"(created_at = %(deep_ts)s and id < %(deep_id)s)) {order} limit 25", p),
+        ("search", "select * from public.search_listings(%(q)s, %(city)s, null, null, 25, 0)", p),
+        ("detail", f"select {_cols(DETAIL_COLUMNS)} from public.listings where id = %(listing)s limit 1", p),
+        ("listings_by_id", f"select {card} from public.listings where status = 'active' "
+                           "and id = any(array[%(listing)s, %(lid)s]::uuid[])", p),
+        ("index_rows", f"select {_cols(INDEX_COLUMNS)} from public.listings where status = 'active' "
+                       "and id = any(array[%(listing)s, %(lid)s]::uuid[])", p),
+        ("similarity_corpus", f"select {_cols(INDEX_COLUMNS)} from public.listings where status = 'active' "
+                              "and created_at >= %(ts)s and (created_at > %(ts)s or (created_at = %(ts)s "
+                              "and id > %(lid)s)) order by created_at, id limit 1000", p),
+        ("latest_marker", f"select id, created_at from public.listings where status = 'active' {order} limit 1", p),
+        ("alerts_recent", f"select {_cols(ALERT_COLUMNS)} from public.listings "
+                          "where status = 'active' and created_at >= %(since)s order by created_at desc limit 1000", p),
+        ("classifier_history", f"select {_cols(HISTORY_COLUMNS)} from public.listings "
+                               "where status = 'active' order by created_at desc limit 5000", p),
+        ("backfill_chunk", "select id, title, description, franchise, \"character\", tags, created_at "
+                           "from public.listings where created_at >= %(ts)s "
+                           "and (created_at > %(ts)s or (created_at = %(ts)s and id > %(lid)s)) "
+                           "order by created_at, id limit 200", p),
+        ("images_by_sha", "select sha256, dhash, renditions, width, height from public.images "
+                          "where sha256 = any(array[%(sha)s])", p),
+        ("similar_images", "select * from public.similar_images(%(dhash)s, 6, 20)", p),
+        ("saved_searches", "select * from public.saved_searches where user_id = %(uid)s "
+                           "order by created_at desc", p),
+        ("imported_refs", "select import_ref from public.listings where owner = %(uid)s "
+                          "and import_ref = any(array['row-0', 'row-1'])", p),
+        ("inbox_page", f"select {chat} from public.chats where (buyer = %(buyer)s or seller = %(buyer)s) "
+                       f"and {chat_keyset} order by updated_at desc, id desc limit 21", p),
+        ("inbox_delta", f"select {chat} from public.chats where (buyer = %(buyer)s or seller = %(buyer)s) "
+                        "and updated_at >= %(chat_ts)s "
+                        "and (updated_at > %(chat_ts)s or (updated_at = %(chat_ts)s and id > %(chat_id)s)) "
+                        "order by updated_at, id limit 100", p),
+        ("thread_latest", f"select {msg} from public.messages where chat = %(chat)s "
+                          "order by created_at desc, id desc limit 50", p),
+        ("thread_new", f"select {msg} from public.messages where chat = %(chat)s and created_at >= %(msg_ts)s "
+                       "and (created_at > %(msg_ts)s or (created_at = %(msg_ts)s and id > %(msg_id)s)) "
+                       "order by created_at, id limit 200", p),
+        ("unread_count", "select coalesce((select sum(buyer_unread) from public.chats where buyer = %(buyer)s "
+                         "and buyer_unread > 0), 0) + coalesce((select sum(seller_unread) from public.chats "
+                         "where seller = %(buyer)s and seller_unread > 0), 0)", p),
+    ]
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+def check_plan(plan):
+    """Problems in one plan: seq scans on app tables, or an RPC the planner didn't inline."""
+    problems = []
+    for node in walk(plan["Plan"]):
+        kind, rel = node.get("Node Type"), node.get("Relation Name")
+        if kind == "Seq Scan" and rel in APP_TABLES:
+            problems.append(f"Seq Scan on {rel}")
+        if kind == "Function Scan" and node.get("Function Name") in INLINED:
+            problems.append(f"{node['Function Name']} not inlined (plan hidden behind a Function Scan)")
+    return problems
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dsn", default=os.environ.get("PLAN_CHECK_DSN") or os.environ.get("DATABASE_URL"),
+                    help="scratch database (default: $PLAN_CHECK_DSN or $DATABASE_URL)")
+    ap.add_argument("--listings", type=int, default=100000)
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--saved", type=int, default=3, help="saved searches per user")
+    ap.add_argument("--chats", type=int, default=5000)
+    ap.add_argument("--out", help="write the JSON plans here")
+    args = ap.parse_args(argv)
+    if psycopg is None:
+        print("plan_check needs psycopg: pip install 'psycopg[binary]'", file=sys.stderr)
+        return 2
+    if not args.dsn:
+        ap.error("--dsn (or PLAN_CHECK_DSN) is required")
+
+    failures, plans = 0, {}
+    # The migrations contain non-ASCII text; don't inherit a SQL_ASCII server's client encoding.
+    with psycopg.connect(args.dsn, cursor_factory=psycopg.ClientCursor, client_encoding="utf8") as conn:
+        cur = conn.cursor()
+        cur.execute("select to_regnamespace('auth') is not null")
+        if not cur.fetchone()[0]:
+            cur.execute(AUTH_SHIM)
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS, "*.sql"))):
+            with open(path, "r", encoding="utf-8") as f:
+                cur.execute(f.read())
+        t0 = time.time()
+        cur.execute(SEED, {"users": args.users, "listings": args.listings, "saved": args.saved, "chats": args.chats})
+        print(f"seeded {args.listings} listings in {time.time() - t0:.1f}s", file=sys.stderr)
+
+        for name, sql, params in queries(sample_params(cur)):
+            cur.execute("explain (analyze, buffers, format json) " + sql, params)
+            plan = cur.fetchone()[0][0]
+            plans[name] = plan
+            problems = check_plan(plan)
+            failures += bool(problems)
+            top = plan["Plan"]
+            print(f"{'FAIL' if problems else 'ok':<5}{name:<26}{plan['Execution Time']:>9.2f}ms  "
+                  f"hit {top.get('Shared Hit Blocks', 0):>6}  read {top.get('Shared Read Blocks', 0):>6}  "
+                  + "; ".join(problems))
+        conn.rollback()
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(plans, f, indent=2, default=str)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
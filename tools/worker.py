@@ -0,0 +1,41 @@
+"""Run the background job worker (listing enrichment after Publish).
+
+Claims jobs from the local SQLite queue (lib/jobs.py), uploads image renditions,
+captions and classifies listings in batches, and writes the results back with the
+service-role client. Run as many as you like against the same queue file:
+
+    python -m tools.worker --batch 8
+    python -m tools.worker --once          # drain the queue and exit
+"""
+import argparse, json, logging, sys
+
+from lib.jobs import get_queue, run_worker
+from lib.enrich import ENRICH_KIND, WORKER_BATCH, handle_enrich
+from lib.sb import service_client
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--batch", type=int, default=WORKER_BATCH, help="jobs claimed (and classified) together")
+    ap.add_argument("--poll", type=float, default=2.0, help="seconds between polls when idle")
+    ap.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    ap.add_argument("--purge-days", type=float, default=7.0, help="drop finished jobs older than this")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    sb = service_client()
+    queue = get_queue()
+    queue.purge(args.purge_days * 86400)
+
+    def enrich(jobs, q):
+        handle_enrich(jobs, q, sb=sb)
+        logging.info("enriched batch of %d; queue %s", len(jobs), json.dumps(q.stats()))
+
+    try:
+        run_worker({ENRICH_KIND: enrich}, batch=args.batch, poll=args.poll, once=args.once, queue=queue)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(queue.stats()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())